@@ -362,6 +362,76 @@ export async function fetchTournamentByIdSmart(tournamentId: string): Promise<To
   return fetchTournamentById(tournamentId);
 }
 
+// Fetch several tournaments in one round trip; ids the backend can't find are skipped.
+// Batch results leave out the invite HTML; use fetchTournamentInvite for that.
+export async function fetchTournamentsByIds(tournamentIds: string[]): Promise<Omit<TournamentDetail, 'infoHtml'>[]> {
+  if (tournamentIds.length === 0) return [];
+  const response = await fetch(`${API_BASE_URL}/tournaments/batch`, {
+    method: 'POST',
+    headers: {
+      'Accept': 'application/json',
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ ids: tournamentIds }),
+  });
+  if (!response.ok) {
+    throw new Error(`Failed to fetch tournaments batch: ${response.status}`);
+  }
+  const data = await response.json();
+  return data.tournaments || [];
+}
+
+export type TournamentHeader = TournamentSummary & {
+  websiteUrl?: string;
+  eventCount: number;
+  hasInvite: boolean;
+};
+
+export type TournamentEvent = {
+  id?: string;
+  abbr?: string;
+  name?: string;
+  type?: string;
+  level?: string;
+  description?: string;
+};
+
+export type TournamentInvite = {
+  html: string | null;
+  truncated: boolean;
+  originalLength: number;
+};
+
+async function backendGet<T>(path: string): Promise<T> {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: 'GET',
+    headers: { 'Accept': 'application/json' },
+  });
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  return response.json();
+}
+
+// Header card only: no events or invite HTML
+export async function fetchTournamentSummary(tournamentId: string): Promise<TournamentHeader> {
+  return backendGet<TournamentHeader>(`/tournament/${encodeURIComponent(tournamentId)}/summary`);
+}
+
+export async function fetchTournamentEvents(tournamentId: string): Promise<TournamentEvent[]> {
+  const data = await backendGet<{ events: TournamentEvent[] }>(`/tournament/${encodeURIComponent(tournamentId)}/events`);
+  return data.events || [];
+}
+
+// eventKey is a Tabroom event ID or abbreviation (e.g. "VCX")
+export async function fetchTournamentEvent(tournamentId: string, eventKey: string): Promise<TournamentEvent> {
+  return backendGet<TournamentEvent>(`/tournament/${encodeURIComponent(tournamentId)}/events/${encodeURIComponent(eventKey)}`);
+}
+
+export async function fetchTournamentInvite(tournamentId: string): Promise<TournamentInvite> {
+  return backendGet<TournamentInvite>(`/tournament/${encodeURIComponent(tournamentId)}/invite`);
+}
+
 export async function getSystemStatus(): Promise<Record<string, any>> {
   return apiGet<Record<string, any>>('status');
 }
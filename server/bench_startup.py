@@ -0,0 +1,63 @@
+"""
+Startup-time benchmark for the API server.
+
+Measures, in fresh interpreters, how long a worker takes to become ready (`import main`
+plus the app lifespan, until /health answers 200) with lazy imports on and off, and what
+the first parse then costs once the deferred modules have to load. Pre-warming is
+disabled so no network calls are timed; the FastAPI test client's own import is excluded.
+
+    python bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import time
+t0 = time.perf_counter()
+import main
+imported = time.perf_counter() - t0
+from fastapi.testclient import TestClient
+t1 = time.perf_counter()
+with TestClient(main.app) as client:
+    while client.get("/health").status_code != 200:
+        time.sleep(0.001)
+    ready = imported + time.perf_counter() - t1
+    import tabroom_api
+    t2 = time.perf_counter()
+    tabroom_api._parse_user_info(b"<html><span class='username'>Jane</span></html>", "utf-8")
+    first_parse = time.perf_counter() - t2
+print(ready, first_parse)
+"""
+
+
+def measure(lazy: bool, runs: int):
+    env = {
+        **os.environ,
+        "TABROOM_LAZY_IMPORTS": "1" if lazy else "0",
+        "TABROOM_PREWARM": "0",
+        "TABROOM_STORE_PATH": os.path.join(tempfile.gettempdir(), "tabroom_bench_store.sqlite3"),
+        "TABROOM_HISTORY_PATH": os.path.join(tempfile.gettempdir(), "tabroom_bench_history.sqlite3"),
+    }
+    ready, first_parse = [], []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        ready.append(float(out[-2]))
+        first_parse.append(float(out[-1]))
+    return statistics.median(ready), statistics.median(first_parse)
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for lazy in (False, True):
+        ready_time, parse_time = measure(lazy, runs)
+        print(f"lazy={lazy!s:5}  time to ready: {ready_time * 1000:7.1f} ms   first parse: {parse_time * 1000:7.1f} ms")
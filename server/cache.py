@@ -0,0 +1,51 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Small thread-safe in-memory cache with a per-entry time-to-live.
+    Expired entries are kept around so callers can still fall back to stale data.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 5000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value if it is still fresh, otherwise None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        fetched_at, value = entry
+        if time.time() - fetched_at > self.ttl:
+            return None
+        return value
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """Return the cached value regardless of age"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def set(self, key: str, value: Any, fetched_at: Optional[float] = None) -> None:
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                # Drop the oldest entry to stay bounded
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[key] = (fetched_at if fetched_at is not None else time.time(), value)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,199 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Aggregations the stats endpoint can group rounds by, mapped to their SQL column
+HISTORY_GROUPINGS = {
+    'event': 'e.division',
+    'judge': 'r.judge',
+    'season': 'e.season',
+    'opponent': 'r.opponent',
+    'tournament': 'e.tourn_name',
+}
+
+
+def season_for(date_iso: Optional[str]) -> Optional[str]:
+    """Debate seasons run August to July, e.g. an Oct 2025 entry belongs to 2025-26"""
+    try:
+        year, month = int(date_iso[:4]), int(date_iso[5:7])
+    except (TypeError, ValueError):
+        return None
+    start = year if month >= 8 else year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def entry_key(entry: dict) -> str:
+    return entry.get('resultUrl') or '|'.join(
+        str(entry.get(field) or '') for field in ('tournName', 'code', 'division', 'dateIso')
+    )
+
+
+class BallotHistoryStore:
+    """
+    Per-user ballot history in a local SQLite file. Entries come from the ballots page,
+    rounds from each entry's result page; both are de-duplicated on insert so syncs can
+    be re-run safely and only have to fetch what's new.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS ballot_entries (
+                    user_key TEXT NOT NULL,
+                    entry_key TEXT NOT NULL,
+                    tourn_name TEXT,
+                    tourn_url TEXT,
+                    date_iso TEXT,
+                    season TEXT,
+                    code TEXT,
+                    division TEXT,
+                    result_url TEXT,
+                    synced_at REAL NOT NULL,
+                    PRIMARY KEY (user_key, entry_key)
+                );
+                CREATE TABLE IF NOT EXISTS ballot_rounds (
+                    user_key TEXT NOT NULL,
+                    entry_key TEXT NOT NULL,
+                    round_label TEXT NOT NULL,
+                    judge TEXT NOT NULL DEFAULT '',
+                    side TEXT,
+                    opponent TEXT,
+                    result TEXT,
+                    PRIMARY KEY (user_key, entry_key, round_label, judge)
+                );
+                CREATE INDEX IF NOT EXISTS ballot_entries_season ON ballot_entries (user_key, season);
+                CREATE INDEX IF NOT EXISTS ballot_entries_division ON ballot_entries (user_key, division);
+                CREATE INDEX IF NOT EXISTS ballot_rounds_judge ON ballot_rounds (user_key, judge);
+                CREATE INDEX IF NOT EXISTS ballot_rounds_opponent ON ballot_rounds (user_key, opponent);
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def synced_entries(self, user_key: str) -> Dict[str, Optional[str]]:
+        """Map of entry_key -> date_iso for everything already stored for the user"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT entry_key, date_iso FROM ballot_entries WHERE user_key = ?", (user_key,)
+            ).fetchall()
+        return {row['entry_key']: row['date_iso'] for row in rows}
+
+    def save_entry(self, user_key: str, entry: dict, rounds: Iterable[dict]) -> int:
+        """
+        Store an entry and its rounds; returns how many rounds were new or changed.
+        Rounds already stored are updated, so results posted after a first sync land on re-sync.
+        """
+        key = entry_key(entry)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ballot_entries"
+                " (user_key, entry_key, tourn_name, tourn_url, date_iso, season, code, division, result_url, synced_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    user_key, key, entry.get('tournName'), entry.get('tournUrl'), entry.get('dateIso'),
+                    season_for(entry.get('dateIso')), entry.get('code'), entry.get('division'),
+                    entry.get('resultUrl'), time.time(),
+                ),
+            )
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT INTO ballot_rounds"
+                " (user_key, entry_key, round_label, judge, side, opponent, result)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (user_key, entry_key, round_label, judge) DO UPDATE SET"
+                " side = excluded.side, opponent = excluded.opponent, result = excluded.result"
+                # Unchanged rows are left alone so they don't count as changes
+                " WHERE side IS NOT excluded.side OR opponent IS NOT excluded.opponent OR result IS NOT excluded.result",
+                [
+                    (user_key, key, r['round'], r.get('judge') or '', r.get('side'), r.get('opponent'), r.get('result'))
+                    for r in rounds
+                ],
+            )
+            return conn.total_changes - before
+
+    # One row per round of an entry with its ballot tally; a panel has one stored row per judge
+    _ROUND_TALLY = (
+        "SELECT r.entry_key, r.round_label, SUM(r.result = 'W') AS ballot_wins, SUM(r.result = 'L') AS ballot_losses"
+        " FROM ballot_rounds r WHERE r.user_key = ? GROUP BY r.entry_key, r.round_label"
+    )
+
+    def entries(self, user_key: str, season: Optional[str] = None) -> List[dict]:
+        """
+        Entries with round records (a round is won on a majority of its ballots) and the
+        underlying ballot counts
+        """
+        query = (
+            "SELECT e.tourn_name, e.tourn_url, e.date_iso, e.season, e.code, e.division, e.result_url,"
+            " SUM(t.ballot_wins > t.ballot_losses) AS wins, SUM(t.ballot_losses > t.ballot_wins) AS losses,"
+            " SUM(t.ballot_wins) AS ballot_wins, SUM(t.ballot_losses) AS ballot_losses"
+            f" FROM ballot_entries e LEFT JOIN ({self._ROUND_TALLY}) t ON t.entry_key = e.entry_key"
+            " WHERE e.user_key = ?"
+        )
+        params = [user_key, user_key]
+        if season:
+            query += " AND e.season = ?"
+            params.append(season)
+        query += " GROUP BY e.entry_key ORDER BY e.date_iso DESC"
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [
+            {
+                'tournName': row['tourn_name'],
+                'tournUrl': row['tourn_url'],
+                'dateIso': row['date_iso'],
+                'season': row['season'],
+                'code': row['code'],
+                'division': row['division'],
+                'resultUrl': row['result_url'],
+                'wins': row['wins'] or 0,
+                'losses': row['losses'] or 0,
+                'ballotWins': row['ballot_wins'] or 0,
+                'ballotLosses': row['ballot_losses'] or 0,
+            }
+            for row in rows
+        ]
+
+    def stats(self, user_key: str, by: str, season: Optional[str] = None) -> List[dict]:
+        """
+        Round records and ballot counts grouped by one of HISTORY_GROUPINGS. Rounds are
+        decided by ballot majority within the group, so by judge each judge's own ballots count.
+        """
+        column = HISTORY_GROUPINGS[by]
+        query = (
+            f"SELECT {column} AS grp, r.entry_key, r.round_label,"
+            " SUM(r.result = 'W') AS ballot_wins, SUM(r.result = 'L') AS ballot_losses"
+            " FROM ballot_rounds r JOIN ballot_entries e"
+            " ON e.user_key = r.user_key AND e.entry_key = r.entry_key"
+            " WHERE r.user_key = ?"
+        )
+        params = [user_key]
+        if season:
+            query += " AND e.season = ?"
+            params.append(season)
+        query += " GROUP BY grp, r.entry_key, r.round_label"
+        query = (
+            "SELECT grp, SUM(ballot_wins > ballot_losses) AS wins, SUM(ballot_losses > ballot_wins) AS losses,"
+            " COUNT(*) AS rounds, SUM(ballot_wins) AS ballot_wins, SUM(ballot_losses) AS ballot_losses"
+            f" FROM ({query}) GROUP BY grp ORDER BY rounds DESC"
+        )
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [
+            {
+                by: row['grp'],
+                'wins': row['wins'] or 0,
+                'losses': row['losses'] or 0,
+                'rounds': row['rounds'],
+                'ballotWins': row['ballot_wins'] or 0,
+                'ballotLosses': row['ballot_losses'] or 0,
+            }
+            for row in rows
+        ]
@@ -0,0 +1,29 @@
+import importlib
+import importlib.util
+import os
+import sys
+import types
+
+# Defer importing heavy third-party modules (requests, bs4) until they are first used,
+# so a worker can start answering /health sooner. Set TABROOM_LAZY_IMPORTS=0 to load eagerly.
+LAZY_IMPORTS = os.environ.get("TABROOM_LAZY_IMPORTS", "1") != "0"
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Stand-in that imports the real module on first attribute access. Each access goes
+    through importlib, whose per-module import lock makes concurrent first uses wait
+    for the import to finish instead of seeing a half-initialised module.
+    """
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self.__name__), attr)
+
+
+def lazy_import(name: str):
+    """Return the named module, or with LAZY_IMPORTS on a stand-in that imports it on first use"""
+    if not LAZY_IMPORTS or name in sys.modules:
+        return importlib.import_module(name)
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return _LazyModule(name)
@@ -0,0 +1,116 @@
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+# Fields a client may ask for with `fields=`
+LISTING_FIELDS = ('id', 'name', 'location', 'city', 'state', 'startDate', 'endDate', 'webname')
+
+
+def _sort_key(tournament: dict) -> Tuple[str, str]:
+    return ((tournament.get('startDate') or '')[:10], tournament.get('id') or '')
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def cursor_for(tournament: dict) -> str:
+    """Cursor that resumes a listing walk right after this tournament"""
+    return encode_cursor(_sort_key(tournament))
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        start, tournament_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(start), str(tournament_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class UpcomingIndex:
+    """
+    Precomputed lookup structures over the cached upcoming-tournaments listing.
+    Tournaments are held in (start date, id) order; the cursor is the sort key of
+    the last item returned, so it stays valid when the listing is refreshed.
+    """
+
+    def __init__(self, tournaments: List[dict]):
+        # The listing this index was built from, so callers can tell when it needs rebuilding
+        self.source = tournaments
+        self.tournaments = sorted(tournaments, key=_sort_key)
+        self.keys = [_sort_key(t) for t in self.tournaments]
+        self.start_dates = [key[0] for key in self.keys]
+        self.by_state = {}
+        self.by_city = {}
+        names = []
+        for position, tournament in enumerate(self.tournaments):
+            state, city = self._state_and_city(tournament)
+            if state:
+                self.by_state.setdefault(state.upper(), []).append(position)
+            if city:
+                self.by_city.setdefault(city.lower(), []).append(position)
+            names.append(((tournament.get('name') or '').lower(), position))
+        names.sort()
+        self.names = [name for name, _ in names]
+        self.name_positions = [position for _, position in names]
+
+    @staticmethod
+    def _state_and_city(tournament: dict) -> Tuple[Optional[str], Optional[str]]:
+        state, city = tournament.get('state'), tournament.get('city')
+        if state or city:
+            return state, city
+        # Entries stored before city/state were split out only carry "City, ST"
+        parts = [p.strip() for p in (tournament.get('location') or '').split(',')]
+        if len(parts) == 2:
+            return parts[1], parts[0]
+        return None, None
+
+    def query(
+        self,
+        state: Optional[str] = None,
+        city: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        name_prefix: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Return one page of matching tournaments and the cursor for the next page (None at the end)"""
+        # Date range and cursor both narrow a contiguous slice of the sorted listing
+        lo = bisect_left(self.start_dates, date_from[:10]) if date_from else 0
+        hi = bisect_right(self.start_dates, date_to[:10]) if date_to else len(self.tournaments)
+        if cursor:
+            lo = max(lo, bisect_right(self.keys, decode_cursor(cursor)))
+
+        candidates = None
+        if state:
+            candidates = set(self.by_state.get(state.upper(), ()))
+        if city:
+            matches = set(self.by_city.get(city.lower(), ()))
+            candidates = matches if candidates is None else candidates & matches
+        if name_prefix:
+            prefix = name_prefix.lower()
+            start = bisect_left(self.names, prefix)
+            end = bisect_left(self.names, prefix + '\uffff')
+            matches = set(self.name_positions[start:end])
+            candidates = matches if candidates is None else candidates & matches
+
+        if candidates is None:
+            positions = range(lo, hi)
+        else:
+            positions = sorted(p for p in candidates if lo <= p < hi)
+
+        page = []
+        next_cursor = None
+        for position in positions:
+            if limit is not None and len(page) == limit:
+                next_cursor = encode_cursor(self.keys[page[-1]])
+                break
+            page.append(position)
+
+        items = [self.tournaments[p] for p in page]
+        if fields:
+            items = [{field: item.get(field) for field in fields} for item in items]
+        return items, next_cursor
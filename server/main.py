@@ -1,13 +1,65 @@
-from fastapi import FastAPI, HTTPException
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager
+from contextvars import copy_context
+from datetime import datetime, timedelta
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 from uuid import uuid4
-import requests
+import json
+import os
+import threading
+import time
+
+from cache import TTLCache
+from history import HISTORY_GROUPINGS, BallotHistoryStore, entry_key as history_entry_key
+from lazy import lazy_import
+from listing import LISTING_FIELDS, UpcomingIndex, cursor_for
+from profiling import PROFILE_ADMIN_TOKEN, get_profile, profile_request, recent_profiles, should_profile
+from store import PublicDataStore
+from upstream import UpstreamUnavailable, bulk_pacing, deadline, upstream_stats
+from tabroom_api import SessionExpired, warm_up, fetch_parsed_ballots, fetch_result_rounds, extraction_plan_stats, parse_memo_stats, login_tabroom, fetch_ballots, login_tabroom_debug, browser_login_get_token, browser_login_via_home_popup, fetch_dashboard_data, fetch_user_tournaments, extract_user_info_from_dashboard, list_upcoming_tournaments, search_tournaments, fetch_tournament_details, tournament_summary, normalize_tournament_events, sanitize_invite_html
+
+requests = lazy_import("requests")
+
+# Startup pre-warming: open pooled connections to the public API and load hot public data
+# (the upcoming list and any pinned tournaments) before /health reports ready.
+PREWARM_ENABLED = os.environ.get("TABROOM_PREWARM", "1") != "0"
+PREWARM_CONNECTIONS = int(os.environ.get("TABROOM_PREWARM_CONNECTIONS", "2"))
+PREWARM_TOURNAMENT_IDS = [i.strip() for i in os.environ.get("TABROOM_PREWARM_TOURNAMENTS", "").split(",") if i.strip()]
+PREWARM_DEADLINE = 30.0
+
+_ready = threading.Event()
+
+
+def _prewarm():
+    started = time.perf_counter()
+    try:
+        with deadline(PREWARM_DEADLINE):
+            warm_up(PREWARM_CONNECTIONS)
+            _get_upcoming_tournaments()
+            for tournament_id, tournament, error in _iter_tournament_details(PREWARM_TOURNAMENT_IDS):
+                if tournament is None:
+                    print(f"Pre-warm could not load tournament {tournament_id}: {error or 'not found'}")
+    except Exception as e:
+        print(f"Pre-warm failed: {e}")
+    finally:
+        _ready.set()
+        print(f"Pre-warm finished in {time.perf_counter() - started:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if PREWARM_ENABLED:
+        threading.Thread(target=_prewarm, name="prewarm", daemon=True).start()
+    else:
+        _ready.set()
+    yield
 
-from tabroom_api import login_tabroom, fetch_ballots, login_tabroom_debug, browser_login_get_token, browser_login_via_home_popup, fetch_dashboard_data, fetch_user_tournaments, extract_user_info_from_dashboard, list_upcoming_tournaments, search_tournaments, fetch_tournament_details
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -16,13 +68,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# Total time a request may spend waiting on Tabroom. Clients can ask for less with X-Request-Timeout (seconds).
+REQUEST_DEADLINE = 25.0
+
+
+@app.middleware("http")
+async def request_deadline(request: Request, call_next):
+    budget = REQUEST_DEADLINE
+    try:
+        budget = min(budget, float(request.headers.get("X-Request-Timeout", budget)))
+    except ValueError:
+        pass
+    with deadline(budget):
+        if not should_profile(request.headers.get("X-Profile")):
+            return await call_next(request)
+        with profile_request(request.url.path) as profile:
+            response = await call_next(request)
+        response.headers["X-Profile-Id"] = profile.id
+        return response
+
+
+@app.exception_handler(UpstreamUnavailable)
+def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailable):
+    # Tabroom calls refused locally (limits, open breaker, spent deadline) fail fast instead of queueing
+    print(f"Upstream unavailable for {request.url.path}: {exc}")
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(SessionExpired)
+def session_expired_handler(request: Request, exc: SessionExpired):
+    # Drop every session backed by the rejected token so later calls 401 without going upstream
+    for session_id in [sid for sid, token in list(_sessions.items()) if token == exc.token]:
+        _sessions.pop(session_id, None)
+        _session_users.pop(session_id, None)
+    return JSONResponse(status_code=401, content={"detail": "Invalid or expired sessionId"})
+
+
 @app.get("/")
 def root():
     return {"message": "Tabroom API Server", "status": "running"}
 
 @app.get("/health")
 def health():
-    return {"ok": True}
+    ready = _ready.is_set()
+    body = {
+        "ok": ready,
+        "ready": ready,
+        "upstream": upstream_stats(),
+        "parse_memo": parse_memo_stats(),
+        "extraction_plans": extraction_plan_stats(),
+    }
+    if not ready:
+        # Keep load balancers from routing traffic here until pre-warming is done
+        return JSONResponse(status_code=503, content=body)
+    return body
 
 
 class LoginRequest(BaseModel):
@@ -47,8 +147,11 @@ def cookie_login(req: LoginRequest):
         # Create a session for the token
         session_id = str(uuid4())
         _sessions[session_id] = token
+        _session_users[session_id] = req.get_identifier().strip().lower()
         print(f"Created session {session_id} with token: {token[:20]}...")
         return TokenResponse(token=session_id)  # Return session ID instead of raw token
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
 
@@ -70,7 +173,7 @@ def ballots(req: BallotsRequest):
                 raise HTTPException(status_code=401, detail="Invalid or expired sessionId")
         html = fetch_ballots(token)
         return {"html": html}
-    except HTTPException:
+    except (HTTPException, UpstreamUnavailable, SessionExpired):
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -87,6 +190,8 @@ def cookie_login_debug(req: LoginRequest):
 
 # Simple in-memory session store. For production, replace with Redis or a DB.
 _sessions: Dict[str, str] = {}
+# Login identifier per session, used as a stable key for per-user data such as ballot history.
+_session_users: Dict[str, str] = {}
 
 
 class SessionResponse(BaseModel):
@@ -99,7 +204,10 @@ def login(req: LoginRequest):
         token = login_tabroom(req.get_identifier(), req.password)
         session_id = str(uuid4())
         _sessions[session_id] = token
+        _session_users[session_id] = req.get_identifier().strip().lower()
         return SessionResponse(sessionId=session_id)
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
 
@@ -111,6 +219,7 @@ def session_login(req: LoginRequest):
         token = login_tabroom(req.get_identifier(), req.password)
         session_id = str(uuid4())
         _sessions[session_id] = token
+        _session_users[session_id] = req.get_identifier().strip().lower()
         print(f"Created session {session_id} with token: {token[:20]}...")
         
         # Try to extract user info immediately after login
@@ -129,6 +238,8 @@ def session_login(req: LoginRequest):
             print(f"Could not extract user info during login: {e}")
         
         return SessionResponse(sessionId=session_id)
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         print(f"Session login failed: {e}")
         raise HTTPException(status_code=401, detail=str(e))
@@ -143,6 +254,7 @@ def session_logout(req: LogoutRequest):
     # Remove the session mapping if it exists
     if req.sessionId in _sessions:
         del _sessions[req.sessionId]
+    _session_users.pop(req.sessionId, None)
     return {"ok": True}
 
 
@@ -184,7 +296,7 @@ def get_dashboard_data(req: DashboardRequest):
         print(f"Found token for session {req.sessionId}: {token[:20]}...")
         dashboard_data = fetch_dashboard_data(token)
         return dashboard_data
-    except HTTPException:
+    except (HTTPException, UpstreamUnavailable, SessionExpired):
         raise
     except Exception as e:
         print(f"Error in dashboard endpoint: {e}")
@@ -200,10 +312,122 @@ def get_user_tournaments(req: DashboardRequest):
         
         tournaments = fetch_user_tournaments(token)
         return {"tournaments": tournaments}
-    except HTTPException:
+    except (HTTPException, UpstreamUnavailable, SessionExpired):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Sections of the home screen and the Tabroom fetchers that back them.
+HOME_SECTIONS = {
+    "dashboard": fetch_dashboard_data,
+    "tournaments": fetch_user_tournaments,
+    "ballots": fetch_ballots,
+}
+
+
+@app.post("/home")
+def get_home(req: DashboardRequest):
+    """
+    Everything the app needs after login in one call: dashboard, tournaments and ballots are
+    fetched from Tabroom concurrently, and a failure in one section doesn't fail the others.
+    """
+    token = _sessions.get(req.sessionId)
+    if not token:
+        raise HTTPException(status_code=401, detail="Invalid or expired sessionId")
+
+    result = {"dashboard": None, "tournaments": [], "ballots": None, "errors": {}}
+    with ThreadPoolExecutor(max_workers=len(HOME_SECTIONS)) as pool:
+        futures = {pool.submit(copy_context().run, fetcher, token): section for section, fetcher in HOME_SECTIONS.items()}
+        for future in as_completed(futures):
+            section = futures[future]
+            try:
+                data = future.result()
+            except SessionExpired:
+                raise
+            except Exception as e:
+                print(f"Error fetching home section {section}: {e}")
+                result["errors"][section] = str(e)
+                continue
+            if section == "ballots":
+                data = {"html": data}
+            result[section] = data
+    return result
+
+
+# Ballot history lives next to the public data store; entries newer than this are re-synced
+# on every sync since rounds keep getting added while a tournament is running.
+HISTORY_PATH = os.environ.get("TABROOM_HISTORY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ballot_history.sqlite3"))
+HISTORY_RESYNC_DAYS = 14
+HISTORY_SYNC_WORKERS = 4
+
+_history = BallotHistoryStore(HISTORY_PATH)
+
+
+def _session_user(session_id: str):
+    """Return (token, user_key) for a session or raise 401"""
+    token = _sessions.get(session_id)
+    user_key = _session_users.get(session_id)
+    if not token or not user_key:
+        raise HTTPException(status_code=401, detail="Invalid or expired sessionId")
+    return token, user_key
+
+
+@app.post("/ballots/history/sync")
+def sync_ballot_history(req: DashboardRequest):
+    """Pull ballots from Tabroom and store rounds for entries that are new or still recent"""
+    token, user_key = _session_user(req.sessionId)
+    try:
+        entries = fetch_parsed_ballots(token)
+    except (UpstreamUnavailable, SessionExpired):
         raise
     except Exception as e:
+        print(f"Error fetching ballots for history sync: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    known = _history.synced_entries(user_key)
+    cutoff = (datetime.now() - timedelta(days=HISTORY_RESYNC_DAYS)).isoformat()
+    pending = [
+        e for e in entries
+        if history_entry_key(e) not in known or (e.get('dateIso') or '') >= cutoff
+    ]
+    print(f"Ballot history sync for {user_key}: {len(entries)} entries, {len(pending)} to fetch")
+
+    def sync_entry(entry):
+        rounds = fetch_result_rounds(token, entry['resultUrl']) if entry.get('resultUrl') else []
+        return _history.save_entry(user_key, entry, rounds)
+
+    added_rounds = 0
+    errors = []
+    with ThreadPoolExecutor(max_workers=HISTORY_SYNC_WORKERS) as pool:
+        futures = {pool.submit(copy_context().run, sync_entry, entry): entry for entry in pending}
+        for future in as_completed(futures):
+            try:
+                added_rounds += future.result()
+            except SessionExpired:
+                raise
+            except Exception as e:
+                print(f"Error syncing ballot entry {futures[future].get('tournName')}: {e}")
+                errors.append(futures[future].get('tournName'))
+    return {
+        "entries": len(entries),
+        "newEntries": len([e for e in pending if history_entry_key(e) not in known]),
+        "newRounds": added_rounds,
+        "errors": errors,
+    }
+
+
+@app.get("/ballots/history")
+def get_ballot_history(sessionId: str, season: Optional[str] = None):
+    _, user_key = _session_user(sessionId)
+    return {"entries": _history.entries(user_key, season)}
+
+
+@app.get("/ballots/history/stats")
+def get_ballot_history_stats(sessionId: str, by: str = "event", season: Optional[str] = None):
+    _, user_key = _session_user(sessionId)
+    if by not in HISTORY_GROUPINGS:
+        raise HTTPException(status_code=400, detail=f"by must be one of: {', '.join(HISTORY_GROUPINGS)}")
+    return {"by": by, "season": season, "stats": _history.stats(user_key, by, season)}
 
 
 @app.get("/active-tournaments")
@@ -216,19 +440,137 @@ def get_active_tournaments(sessionId: str):
         
         tournaments = fetch_user_tournaments(token)
         return {"tournaments": tournaments}
-    except HTTPException:
+    except (HTTPException, UpstreamUnavailable, SessionExpired):
         raise
     except Exception as e:
         print(f"Error in active-tournaments endpoint: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# Public data is the same for every user: keep it in memory, write it through to a local
+# SQLite file so restarts come up warm, and serve stale copies while refreshing in the background.
+UPCOMING_CACHE_TTL = 10 * 60
+TOURNAMENT_CACHE_TTL = 15 * 60
+STORE_PATH = os.environ.get("TABROOM_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "public_data.sqlite3"))
+_UPCOMING_KEY = "upcoming"
+
+_upcoming_cache = TTLCache(ttl=UPCOMING_CACHE_TTL, max_entries=1)
+_tournament_cache = TTLCache(ttl=TOURNAMENT_CACHE_TTL)
+_store = PublicDataStore(STORE_PATH)
+_refresh_pool = ThreadPoolExecutor(max_workers=2)
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh(cache: TTLCache, kind: str, key: str, fetch):
+    """Fetch from Tabroom and write the result to memory and disk"""
+    value = fetch()
+    if value:
+        cache.set(key, value)
+        _store.put(kind, key, value)
+    return value
+
+
+def _refresh_in_background(cache: TTLCache, kind: str, key: str, fetch) -> None:
+    with _refreshing_lock:
+        if (kind, key) in _refreshing:
+            return
+        _refreshing.add((kind, key))
+
+    def run():
+        try:
+            _refresh(cache, kind, key, fetch)
+        except Exception as e:
+            print(f"Background refresh of {kind}/{key} failed: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard((kind, key))
+
+    _refresh_pool.submit(run)
+
+
+def _read_through(cache: TTLCache, kind: str, key: str, fetch):
+    """Serve from memory, then the on-disk store, then Tabroom; stale copies trigger a background refresh"""
+    value = cache.get(key)
+    if value is not None:
+        return value
+    stale = cache.get_stale(key)
+    if stale is None:
+        stored = _store.get(kind, key)
+        if stored is not None:
+            fetched_at, stale = stored
+            cache.set(key, stale, fetched_at=fetched_at)
+            if cache.get(key) is not None:
+                return stale
+    if stale is not None:
+        print(f"Serving stale {kind}/{key} while refreshing")
+        _refresh_in_background(cache, kind, key, fetch)
+        return stale
+    return _refresh(cache, kind, key, fetch)
+
+
+def _get_upcoming_tournaments() -> list:
+    return _read_through(_upcoming_cache, "upcoming", _UPCOMING_KEY, list_upcoming_tournaments)
+
+
+# Page size cap for the upcoming listing; requests without paging params still get the full list.
+UPCOMING_MAX_PAGE_SIZE = 500
+_upcoming_index: Optional[UpcomingIndex] = None
+
+
+def _get_upcoming_index() -> UpcomingIndex:
+    """Return the index over the current upcoming listing, rebuilding it when the listing changes"""
+    global _upcoming_index
+    tournaments = _get_upcoming_tournaments()
+    index = _upcoming_index
+    if index is None or index.source is not tournaments:
+        index = UpcomingIndex(tournaments)
+        _upcoming_index = index
+    return index
+
+
+def _parse_listing_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    field_list = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in field_list if f not in LISTING_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return field_list
+
+
 @app.get("/tournaments/upcoming")
-def get_upcoming_tournaments():
+def get_upcoming_tournaments(
+    state: Optional[str] = None,
+    city: Optional[str] = None,
+    dateFrom: Optional[str] = None,
+    dateTo: Optional[str] = None,
+    namePrefix: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+):
     try:
         print("Fetching upcoming tournaments")
-        tournaments = list_upcoming_tournaments()
-        return {"tournaments": tournaments}
+        if limit is not None and not 1 <= limit <= UPCOMING_MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"limit must be between 1 and {UPCOMING_MAX_PAGE_SIZE}")
+        field_list = _parse_listing_fields(fields)
+        try:
+            tournaments, next_cursor = _get_upcoming_index().query(
+                state=state,
+                city=city,
+                date_from=dateFrom,
+                date_to=dateTo,
+                name_prefix=namePrefix,
+                cursor=cursor,
+                limit=limit,
+                fields=field_list,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"tournaments": tournaments, "nextCursor": next_cursor}
+    except (HTTPException, UpstreamUnavailable):
+        raise
     except Exception as e:
         print(f"Error fetching upcoming tournaments: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -240,26 +582,323 @@ def search_tournaments_endpoint(q: str, time: str = "both"):
         print(f"Searching tournaments: {q}, time: {time}")
         tournaments = search_tournaments(q, time)
         return {"tournaments": tournaments}
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         print(f"Error searching tournaments: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# Upper bounds for the batch endpoint so one request can't flood Tabroom.
+BATCH_MAX_IDS = 100
+BATCH_MAX_WORKERS = 8
+
+
+# Sub-resources of a tournament's details, each cached on its own TTL. One upstream fetch
+# fills all of them, so whichever expires first refreshes the rest.
+TOURNAMENT_SUMMARY_CACHE_TTL = 15 * 60
+TOURNAMENT_EVENTS_CACHE_TTL = 30 * 60
+TOURNAMENT_INVITE_CACHE_TTL = 60 * 60
+
+_tournament_parts = {
+    "summary": (TTLCache(ttl=TOURNAMENT_SUMMARY_CACHE_TTL), "tournament_summary", tournament_summary),
+    "events": (TTLCache(ttl=TOURNAMENT_EVENTS_CACHE_TTL), "tournament_events", lambda t: normalize_tournament_events(t.get("events"))),
+    # Invite HTML is the bulk of a tournament's payload, so keep fewer of them in memory
+    "invite": (TTLCache(ttl=TOURNAMENT_INVITE_CACHE_TTL, max_entries=500), "tournament_invite", lambda t: sanitize_invite_html(t.get("infoHtml"))),
+}
+
+
+def _store_tournament_parts(tournament_id: str, tournament: dict, skip: Optional[str] = None) -> dict:
+    """Derive every sub-resource from freshly fetched details and write them to memory and disk"""
+    parts = {}
+    for part, (cache, kind, derive) in _tournament_parts.items():
+        parts[part] = value = derive(tournament)
+        if part != skip:
+            cache.set(tournament_id, value)
+            _store.put(kind, tournament_id, value)
+    return parts
+
+
+def _fetch_tournament_details(tournament_id: str) -> Optional[dict]:
+    tournament = fetch_tournament_details(tournament_id)
+    if not tournament:
+        return tournament
+    _store_tournament_parts(tournament_id, tournament)
+    # The invite HTML lives only in the (smaller) invite cache; see get_tournament_details
+    return {key: value for key, value in tournament.items() if key != "infoHtml"}
+
+
+def _get_tournament_details(tournament_id: str) -> Optional[dict]:
+    """Return tournament details, without infoHtml, from the cache or store, fetching from Tabroom on a miss"""
+    return _read_through(_tournament_cache, "tournament", tournament_id, lambda: _fetch_tournament_details(tournament_id))
+
+
+def _get_tournament_part(tournament_id: str, part: str) -> Optional[dict]:
+    """Return one sub-resource of a tournament through its own cache"""
+    cache, kind, _ = _tournament_parts[part]
+
+    def fetch():
+        tournament = fetch_tournament_details(tournament_id)
+        if not tournament:
+            return None
+        # _read_through stores the requested part itself
+        return _store_tournament_parts(tournament_id, tournament, skip=part)[part]
+
+    return _read_through(cache, kind, tournament_id, fetch)
+
+
+def _get_tournament_details_paced(tournament_id: str) -> Optional[dict]:
+    # Fan-out fetches queue for rate-limit tokens within the deadline instead of failing fast
+    with bulk_pacing():
+        return _get_tournament_details(tournament_id)
+
+
+def _iter_tournament_details(tournament_ids: List[str]):
+    """
+    Yield (tournament_id, details, error) triples, cache hits first, then misses as
+    they finish fetching on a bounded pool of worker threads. details is None both for
+    tournaments Tabroom doesn't have and for failed fetches; error (the exception) tells
+    them apart, so throttled or breaker-rejected ids aren't mistaken for missing ones.
+    """
+    misses = []
+    for tournament_id in tournament_ids:
+        cached = _tournament_cache.get(tournament_id)
+        if cached is not None:
+            yield tournament_id, cached, None
+        else:
+            misses.append(tournament_id)
+    if not misses:
+        return
+    with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(misses))) as pool:
+        futures = {pool.submit(copy_context().run, _get_tournament_details_paced, tournament_id): tournament_id for tournament_id in misses}
+        for future in as_completed(futures):
+            tournament_id = futures[future]
+            try:
+                yield tournament_id, future.result(), None
+            except Exception as e:
+                print(f"Error fetching tournament details for {tournament_id}: {e}")
+                yield tournament_id, None, e
+
+
 @app.get("/tournament/{tournament_id}")
 def get_tournament_details(tournament_id: str, sessionId: Optional[str] = None):
     try:
         print(f"Fetching tournament details for ID: {tournament_id}")
-        tournament = fetch_tournament_details(tournament_id)
+        tournament = _get_tournament_details(tournament_id)
         if tournament is None:
             raise HTTPException(status_code=404, detail="Tournament not found")
-        return tournament
-    except HTTPException:
+        invite = _get_tournament_part(tournament_id, "invite")
+        return {**tournament, "infoHtml": invite["html"] if invite else None}
+    except (HTTPException, UpstreamUnavailable):
         raise
     except Exception as e:
         print(f"Error fetching tournament details: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _tournament_part_or_404(tournament_id: str, part: str) -> dict:
+    try:
+        print(f"Fetching tournament {part} for ID: {tournament_id}")
+        value = _get_tournament_part(tournament_id, part)
+        if value is None:
+            raise HTTPException(status_code=404, detail="Tournament not found")
+        return value
+    except (HTTPException, UpstreamUnavailable):
+        raise
+    except Exception as e:
+        print(f"Error fetching tournament {part}: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/tournament/{tournament_id}/summary")
+def get_tournament_summary(tournament_id: str):
+    """Header-card fields only: no events, no invite HTML"""
+    return _tournament_part_or_404(tournament_id, "summary")
+
+
+@app.get("/tournament/{tournament_id}/events")
+def get_tournament_events(tournament_id: str):
+    return {"events": _tournament_part_or_404(tournament_id, "events")["events"]}
+
+
+@app.get("/tournament/{tournament_id}/events/{event_key}")
+def get_tournament_event(tournament_id: str, event_key: str):
+    """Look up one event by its Tabroom event ID or its abbreviation (e.g. "VCX")"""
+    events = _tournament_part_or_404(tournament_id, "events")
+    position = events["byId"].get(event_key)
+    if position is None:
+        position = events["byAbbr"].get(event_key.lower())
+    if position is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return events["events"][position]
+
+
+@app.get("/tournament/{tournament_id}/invite")
+def get_tournament_invite(tournament_id: str):
+    """Sanitized invite HTML, capped at INVITE_HTML_MAX_CHARS characters (see `truncated`)"""
+    return _tournament_part_or_404(tournament_id, "invite")
+
+
+class TournamentBatchRequest(BaseModel):
+    ids: List[str]
+    stream: bool = False
+
+
+@app.post("/tournaments/batch")
+def get_tournament_details_batch(req: TournamentBatchRequest):
+    """
+    Details for up to BATCH_MAX_IDS tournaments, in the shape of /tournament/{id} minus
+    infoHtml (fetch /tournament/{id}/invite for that)
+    """
+    # De-duplicate while keeping the client's order
+    tournament_ids = list(dict.fromkeys(str(i) for i in req.ids if str(i)))
+    if len(tournament_ids) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_IDS} ids per batch")
+    print(f"Batch tournament details for {len(tournament_ids)} ids (stream={req.stream})")
+
+    if req.stream:
+        def ndjson():
+            for tournament_id, tournament, error in _iter_tournament_details(tournament_ids):
+                line = {"id": tournament_id, "tournament": tournament}
+                if error is not None:
+                    line["error"] = str(error)
+                yield json.dumps(line) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    results, errors = {}, {}
+    for tournament_id, tournament, error in _iter_tournament_details(tournament_ids):
+        results[tournament_id] = tournament
+        if error is not None:
+            errors[tournament_id] = error
+    if errors and len(errors) == len(tournament_ids):
+        # Nothing could be fetched: surface it as a retryable failure rather than an empty 200
+        error = next(iter(errors.values()))
+        if isinstance(error, UpstreamUnavailable):
+            raise error
+        raise HTTPException(status_code=502, detail=str(error))
+    return {
+        "tournaments": [results[i] for i in tournament_ids if results.get(i) is not None],
+        "notFound": [i for i in tournament_ids if results.get(i) is None and i not in errors],
+        "failed": [{"id": i, "error": str(errors[i])} for i in tournament_ids if i in errors],
+    }
+
+
+# Bulk export walks the listing in chunks so memory stays flat however many tournaments
+# there are; each chunk's detail misses are filled on the batch pool under their own deadline.
+# Fetches refused locally (rate limit, open breaker, spent deadline) are retried with backoff
+# before a record is emitted with detailsError.
+EXPORT_CHUNK_SIZE = 50
+EXPORT_CHUNK_DEADLINE = 60.0
+EXPORT_RETRIES = 2
+EXPORT_RETRY_BACKOFF = 1.0
+
+
+def _export_chunk(tournaments: List[dict], with_details: bool, fields: Optional[List[str]]) -> Tuple[List[str], int]:
+    """
+    NDJSON lines for one chunk of the listing, in listing order, each with its resume
+    cursor; also returns how many records carry a detailsError
+    """
+    details, errors = {}, {}
+    if with_details:
+        pending = [str(t.get("id")) for t in tournaments if t.get("id")]
+        for attempt in range(EXPORT_RETRIES + 1):
+            if attempt:
+                time.sleep(EXPORT_RETRY_BACKOFF * 2 ** (attempt - 1))
+            # A streaming export outlives the request deadline by design; each pass gets its own budget
+            with deadline(EXPORT_CHUNK_DEADLINE, replace=True):
+                for tournament_id, tournament, error in _iter_tournament_details(pending):
+                    details[tournament_id] = tournament
+                    if error is None:
+                        errors.pop(tournament_id, None)
+                    else:
+                        errors[tournament_id] = error
+            pending = [i for i, e in errors.items() if isinstance(e, UpstreamUnavailable)]
+            if not pending:
+                break
+    lines = []
+    for tournament in tournaments:
+        tournament_id = str(tournament.get("id"))
+        record = {
+            "id": tournament.get("id"),
+            "cursor": cursor_for(tournament),
+            "tournament": {field: tournament.get(field) for field in fields} if fields else tournament,
+        }
+        if with_details:
+            record["details"] = details.get(tournament_id)
+            if tournament_id in errors:
+                record["detailsError"] = str(errors[tournament_id])
+        lines.append(json.dumps(record) + "\n")
+    return lines, len(errors)
+
+
+@app.get("/tournaments/export")
+def export_tournaments(
+    state: Optional[str] = None,
+    city: Optional[str] = None,
+    dateFrom: Optional[str] = None,
+    dateTo: Optional[str] = None,
+    namePrefix: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    details: bool = True,
+):
+    """
+    Stream the upcoming listing (and each tournament's details, without infoHtml) as NDJSON. Every record
+    carries the cursor to resume after it. Records whose details couldn't be fetched have
+    details null plus detailsError. The last line is {"done": true, ...} with the number
+    of such records in detailsFailed and nextCursor set when `limit` stopped the export early.
+    """
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    field_list = _parse_listing_fields(fields)
+    index = _get_upcoming_index()
+    filters = dict(state=state, city=city, date_from=dateFrom, date_to=dateTo, name_prefix=namePrefix)
+    try:
+        first_page, first_cursor = index.query(cursor=cursor, limit=min(EXPORT_CHUNK_SIZE, limit or EXPORT_CHUNK_SIZE), **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"Exporting tournaments (details={details}, cursor={cursor is not None}, limit={limit})")
+
+    def ndjson():
+        page, next_cursor = first_page, first_cursor
+        exported = failed = 0
+        while page:
+            lines, chunk_failed = _export_chunk(page, details, field_list)
+            yield from lines
+            exported += len(page)
+            failed += chunk_failed
+            if next_cursor is None or (limit is not None and exported >= limit):
+                break
+            chunk = EXPORT_CHUNK_SIZE if limit is None else min(EXPORT_CHUNK_SIZE, limit - exported)
+            page, next_cursor = index.query(cursor=next_cursor, limit=chunk, **filters)
+        yield json.dumps({"done": True, "exported": exported, "detailsFailed": failed, "nextCursor": next_cursor}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+def _require_admin(admin_token: Optional[str]) -> None:
+    if not PROFILE_ADMIN_TOKEN or admin_token != PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.get("/admin/profiles")
+def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    """Recently captured request profiles, newest first (phase totals only)"""
+    _require_admin(x_admin_token)
+    return {"profiles": recent_profiles()}
+
+
+@app.get("/admin/profiles/{profile_id}")
+def get_request_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Full profile: per-phase totals, individual spans and the most common sampled stacks"""
+    _require_admin(x_admin_token)
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
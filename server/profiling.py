@@ -0,0 +1,192 @@
+import functools
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+# Profiling is off unless a request carries X-Profile with the admin token, or is picked by sampling.
+PROFILE_ADMIN_TOKEN = os.environ.get("TABROOM_ADMIN_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.environ.get("TABROOM_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_BUFFER_SIZE = 50
+# Stack sampling interval and how many distinct stacks to keep in a profile summary
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_TOP_STACKS = 30
+PROFILE_MAX_SPANS = 500
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+_profile_ids = itertools.count(1)
+_profiles = deque(maxlen=PROFILE_BUFFER_SIZE)
+_profiles_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Timed spans plus sampled stacks for one request"""
+
+    def __init__(self, path: str):
+        self.id = str(next(_profile_ids))
+        self.path = path
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.samples = Counter()
+        self.threads = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name=f"profile-{self.id}", daemon=True)
+
+    def track_thread(self) -> None:
+        with self._lock:
+            self.threads.add(threading.get_ident())
+
+    def add_span(self, name: str, start: float, duration: float) -> None:
+        with self._lock:
+            if len(self.spans) < PROFILE_MAX_SPANS:
+                self.spans.append((name, start - self._started, duration))
+
+    def _sample(self) -> None:
+        """Periodically record the stacks of every thread that has done work for this request"""
+        while not self._stopped.wait(PROFILE_SAMPLE_INTERVAL):
+            with self._lock:
+                threads = set(self.threads)
+            frames = sys._current_frames()
+            for thread_id in threads:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < 40:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def summary(self, include_details: bool = True) -> dict:
+        phases = {}
+        for name, _, duration in self.spans:
+            phase = phases.setdefault(name, {"count": 0, "totalMs": 0.0})
+            phase["count"] += 1
+            phase["totalMs"] = round(phase["totalMs"] + duration * 1000, 2)
+        result = {
+            "id": self.id,
+            "path": self.path,
+            "startedAt": self.started_at,
+            "durationMs": round(self.duration * 1000, 2) if self.duration is not None else None,
+            "phases": phases,
+        }
+        if include_details:
+            result["spans"] = [
+                {"name": name, "startMs": round(start * 1000, 2), "durationMs": round(duration * 1000, 2)}
+                for name, start, duration in self.spans
+            ]
+            result["samples"] = [
+                {"stack": stack, "count": count} for stack, count in self.samples.most_common(PROFILE_TOP_STACKS)
+            ]
+        return result
+
+
+class SpanRecorder:
+    """Collects spans in a process that can't see the request's profile, such as a parse worker"""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self.spans = []
+
+    def track_thread(self) -> None:
+        pass
+
+    def add_span(self, name: str, start: float, duration: float) -> None:
+        if len(self.spans) < PROFILE_MAX_SPANS:
+            self.spans.append((name, start - self._started, duration))
+
+
+def should_profile(profile_header: Optional[str]) -> bool:
+    if PROFILE_ADMIN_TOKEN and profile_header == PROFILE_ADMIN_TOKEN:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+@contextmanager
+def profile_request(path: str):
+    """Profile everything done on behalf of the request inside the block; yields the profile"""
+    profile = RequestProfile(path)
+    token = _current.set(profile)
+    profile._sampler.start()
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        profile.duration = time.perf_counter() - profile._started
+        profile._stopped.set()
+        profile._sampler.join()
+        with _profiles_lock:
+            _profiles.append(profile)
+
+
+def is_profiling() -> bool:
+    return _current.get() is not None
+
+
+@contextmanager
+def record_spans():
+    """Collect spans from the block into a SpanRecorder (yielded) for replay_spans() elsewhere"""
+    recorder = SpanRecorder()
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+
+
+def replay_spans(spans: list, started: float) -> None:
+    """Add spans recorded by a SpanRecorder to the current profile, offset from `started` (perf_counter)"""
+    profile = _current.get()
+    if profile is None:
+        return
+    for name, offset, duration in spans:
+        profile.add_span(name, started + offset, duration)
+
+
+@contextmanager
+def span(name: str):
+    """Time a step for the current request's profile; a no-op when the request isn't profiled"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    profile.track_thread()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_span(name, start, time.perf_counter() - start)
+
+
+def profiled(name: str):
+    """Decorator form of span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def recent_profiles() -> List[dict]:
+    with _profiles_lock:
+        return [p.summary(include_details=False) for p in reversed(_profiles)]
+
+
+def get_profile(profile_id: str) -> Optional[dict]:
+    with _profiles_lock:
+        for profile in _profiles:
+            if profile.id == profile_id:
+                return profile.summary()
+    return None
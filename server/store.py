@@ -0,0 +1,54 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+
+class PublicDataStore:
+    """
+    On-disk copy of public Tabroom data (upcoming list, tournament details) so a
+    restarted worker can serve warm data before it has talked to Tabroom.
+    Rows are keyed by (kind, key) and carry the time they were fetched upstream.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS public_data ("
+                " kind TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " PRIMARY KEY (kind, key))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, kind: str, key: str) -> Optional[Tuple[float, Any]]:
+        """Return (fetched_at, value) or None if nothing is stored"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT fetched_at, payload FROM public_data WHERE kind = ? AND key = ?", (kind, key)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading {kind}/{key} from store: {e}")
+            return None
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def put(self, kind: str, key: str, value: Any, fetched_at: Optional[float] = None) -> None:
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO public_data (kind, key, fetched_at, payload) VALUES (?, ?, ?, ?)",
+                    (kind, key, fetched_at if fetched_at is not None else time.time(), json.dumps(value)),
+                )
+        except sqlite3.Error as e:
+            print(f"Error writing {kind}/{key} to store: {e}")
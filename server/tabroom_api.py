@@ -1,14 +1,33 @@
-import requests
-from requests.utils import dict_from_cookiejar
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from typing import Optional, Tuple
+from __future__ import annotations
+
+import copy
+import hashlib
+import http.cookiejar
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+from functools import lru_cache
+from urllib.parse import urljoin, urlsplit
+from cache import TTLCache
+from lazy import lazy_import
+from profiling import is_profiling, profiled, record_spans, replay_spans, span
+from upstream import UPSTREAM_MAX_CONCURRENCY, UpstreamUnavailable, upstream_get, upstream_post, upstream_request
+from typing import List, Optional, Tuple
+
+requests = lazy_import("requests")
+bs4 = lazy_import("bs4")
 
 LOGIN_URL = "https://www.tabroom.com/index/index.mhtml"
 LOGIN_SAVE_URL = "https://www.tabroom.com/user/login/login_save.mhtml"
 BALLOT_URL = "https://www.tabroom.com/user/ballots.mhtml"
 DASHBOARD_URL = "https://www.tabroom.com/user/index.mhtml"
 TOURNAMENTS_URL = "https://www.tabroom.com/user/tournaments.mhtml"
+USER_TOURNAMENTS_URL = "https://www.tabroom.com/user/student/index.mhtml"
 
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.0 Mobile/15E148 Safari/604.1",
@@ -18,13 +37,153 @@ DEFAULT_HEADERS = {
 }
 
 
-def _extract_login_form(session: requests.Session):
-    get_resp = session.get(LOGIN_URL, allow_redirects=True, timeout=20)
+# HTML parsing can run inline in the request thread (default) or in a pool of worker
+# processes, so BeautifulSoup work isn't serialized on the GIL. Parsers receive the raw
+# page bytes and return small plain results, which keeps the pickling cheap.
+PARSE_MODE = os.environ.get("TABROOM_PARSE_MODE", "inline")
+PARSE_WORKERS = int(os.environ.get("TABROOM_PARSE_WORKERS", "0")) or None
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn rather than fork: the server process has live threads and sockets
+            _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _parse_pool
+
+
+def _parse_in_worker(parser, record: bool, *args):
+    """Worker side of run_parser: also ships back the plan counters and spans the parse produced"""
+    if not record:
+        return parser(*args), _extraction_plans.take_counts(), []
+    with record_spans() as recorder:
+        result = parser(*args)
+    return result, _extraction_plans.take_counts(), recorder.spans
+
+
+def run_parser(parser, *args):
+    """Run a module-level parse function according to PARSE_MODE"""
+    if PARSE_MODE != "process":
+        return parser(*args)
+    started = time.perf_counter()
+    result, plan_counts, spans = _get_parse_pool().submit(_parse_in_worker, parser, is_profiling(), *args).result()
+    _extraction_plans.merge_counts(plan_counts)
+    replay_spans(spans, started)
+    return result
+
+
+# Parsed results keyed by a hash of the page body, per page type. Tabroom pages are often
+# byte-identical between polls, so a repeat costs a hash instead of a full parse.
+PARSE_MEMO_SIZE = 256
+
+_parse_memo = {}
+_parse_memo_stats = {}
+_parse_memo_lock = threading.Lock()
+
+
+def parse_page(page_type: str, parser, content: bytes, encoding: Optional[str], *args):
+    """run_parser with a bounded LRU memo keyed on the content hash and parser arguments"""
+    key = (hashlib.sha256(content).hexdigest(), encoding, args)
+    with _parse_memo_lock:
+        memo = _parse_memo.setdefault(page_type, OrderedDict())
+        stats = _parse_memo_stats.setdefault(page_type, {'hits': 0, 'misses': 0})
+        if key in memo:
+            memo.move_to_end(key)
+            stats['hits'] += 1
+            return copy.deepcopy(memo[key])
+        stats['misses'] += 1
+    with span(f"parse {page_type}"):
+        result = run_parser(parser, content, encoding, *args)
+    with _parse_memo_lock:
+        memo[key] = copy.deepcopy(result)
+        while len(memo) > PARSE_MEMO_SIZE:
+            memo.popitem(last=False)
+    return result
+
+
+def parse_memo_stats() -> dict:
+    """Hit/miss counts and hit rate per page type"""
+    with _parse_memo_lock:
+        return {
+            page_type: {
+                **stats,
+                'size': len(_parse_memo.get(page_type, ())),
+                'hit_rate': round(stats['hits'] / (stats['hits'] + stats['misses']), 3) if stats['hits'] + stats['misses'] else 0.0,
+            }
+            for page_type, stats in _parse_memo_stats.items()
+        }
+
+
+class ExtractionPlans:
+    """
+    Remembers which selector or table position last produced valid data for each
+    extraction, so the next parse can try it first and skip the exploratory scan.
+    With PARSE_MODE=process every worker process learns its own plans, and run_parser
+    merges the workers' hit/miss counters into the server process's instance.
+    """
+
+    def __init__(self):
+        self._plans = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        return self._plans.get(name)
+
+    def learn(self, name: str, plan) -> None:
+        self._plans[name] = plan
+
+    def hit(self, name: str) -> None:
+        self._count(name, 'hits')
+
+    def miss(self, name: str) -> None:
+        self._count(name, 'misses')
+
+    def _count(self, name: str, field: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, {'hits': 0, 'misses': 0})
+            stats[field] += 1
+
+    def take_counts(self) -> dict:
+        """Return the counters and reset them, so a worker reports each parse's counts once"""
+        with self._lock:
+            counts, self._stats = self._stats, {}
+        return counts
+
+    def merge_counts(self, counts: dict) -> None:
+        with self._lock:
+            for name, fields in counts.items():
+                stats = self._stats.setdefault(name, {'hits': 0, 'misses': 0})
+                for field, count in fields.items():
+                    stats[field] += count
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+_extraction_plans = ExtractionPlans()
+
+
+def extraction_plan_stats() -> dict:
+    return _extraction_plans.stats()
+
+
+@profiled("soup")
+def _make_soup(content: bytes, encoding: Optional[str]) -> bs4.BeautifulSoup:
+    return bs4.BeautifulSoup(content, 'html.parser', from_encoding=encoding)
+
+
+def _parse_login_form(content: bytes, encoding: Optional[str]):
     form_fields = {}
     action_url = LOGIN_SAVE_URL
     credential_field = None
     try:
-        soup = BeautifulSoup(get_resp.text, 'html.parser')
+        soup = _make_soup(content, encoding)
         # Look for the login form specifically
         login_form = soup.find('form', {'action': '/user/login/login_save.mhtml'})
         if not login_form:
@@ -52,6 +211,47 @@ def _extract_login_form(session: requests.Session):
     return action_url, form_fields, credential_field
 
 
+class SessionExpired(Exception):
+    """Raised when Tabroom bounces an authenticated request to the login page."""
+
+    def __init__(self, token: str):
+        super().__init__("Tabroom session expired")
+        self.token = token
+
+
+# Tokens Tabroom has already rejected, so repeat calls fail without going upstream
+_expired_tokens = TTLCache(ttl=24 * 60 * 60, max_entries=10000)
+_LOGIN_REDIRECT_RE = re.compile(r'^/user/login/|^/index/index\.mhtml')
+MAX_REDIRECTS = 5
+
+
+def _authenticated_get(client, url: str, token: str, **kwargs) -> requests.Response:
+    """
+    GET an authenticated page, following redirects by hand so a bounce to the login
+    page is caught from the Location header before any body is downloaded.
+    """
+    if _expired_tokens.get(token):
+        raise SessionExpired(token)
+    for _ in range(MAX_REDIRECTS):
+        response = upstream_get(client, url, allow_redirects=False, stream=True, **kwargs)
+        if not response.is_redirect:
+            return response
+        location = urljoin(url, response.headers.get('Location', ''))
+        # Release the connection without reading the redirect body
+        response.close()
+        if _LOGIN_REDIRECT_RE.search(urlsplit(location).path):
+            print(f"Tabroom redirected {url} to login, token expired")
+            _expired_tokens.set(token, True)
+            raise SessionExpired(token)
+        url = location
+    raise Exception(f"Too many redirects fetching {url}")
+
+
+def _extract_login_form(session: requests.Session):
+    get_resp = upstream_get(session, LOGIN_URL, allow_redirects=True)
+    return parse_page('login_form', _parse_login_form, get_resp.content, get_resp.encoding)
+
+
 def login_tabroom(email: str, password: str) -> str:
     """
     Logs into Tabroom and returns the TabroomToken cookie.
@@ -78,11 +278,11 @@ def login_tabroom(email: str, password: str) -> str:
     print(f"Debug: payload keys={list(payload.keys())}")
 
     # Execute login against the discovered action URL, defaulting to known save URL
-    response = session.post(
+    response = upstream_post(
+        session,
         action_url or LOGIN_SAVE_URL,
         data=payload,
         allow_redirects=True,
-        timeout=20,
         headers={
             **DEFAULT_HEADERS,
             "Origin": "https://www.tabroom.com",
@@ -92,16 +292,16 @@ def login_tabroom(email: str, password: str) -> str:
 
     print(f"Debug: response status={response.status_code}")
     print(f"Debug: response URL={response.url}")
-    print(f"Debug: cookies after login={dict_from_cookiejar(session.cookies)}")
+    print(f"Debug: cookies after login={requests.utils.dict_from_cookiejar(session.cookies)}")
 
-    cookies = dict_from_cookiejar(session.cookies)
+    cookies = requests.utils.dict_from_cookiejar(session.cookies)
     token = cookies.get("TabroomToken") or response.cookies.get("TabroomToken")
     if token:
         return token
 
     # As a fallback, try accessing an authenticated page to force cookie set
-    session.get(BALLOT_URL, allow_redirects=True, timeout=20, headers=DEFAULT_HEADERS)
-    cookies = dict_from_cookiejar(session.cookies)
+    upstream_get(session, BALLOT_URL, allow_redirects=True, headers=DEFAULT_HEADERS)
+    cookies = requests.utils.dict_from_cookiejar(session.cookies)
     token = cookies.get("TabroomToken")
     if token:
         return token
@@ -109,76 +309,130 @@ def login_tabroom(email: str, password: str) -> str:
     raise Exception("Login failed — check credentials or try again.")
 
 
+def _email_display_name(email: Optional[str]) -> str:
+    """Fallback display name derived from the login email"""
+    if email and '@' in email:
+        # Extract name from email (before @)
+        return email.split('@')[0].replace('.', ' ').title()
+    return email or 'User'
+
+
+# Selectors tried, in order, when looking for the user's display name
+_NAME_SELECTORS = [
+    'span.username', 'div.userinfo', '.user-name', '.username',
+    'span[class*="user"]', 'div[class*="user"]',
+    'h1', 'h2', '.welcome', '.greeting'
+]
+
+
+def _name_from_selector(soup: bs4.BeautifulSoup, selector: str) -> Tuple[bool, Optional[str]]:
+    """
+    Returns (matched, name): matched is True when the selector hits an element with text,
+    which ends the search; name is None when that text doesn't contain a usable name.
+    """
+    name_element = soup.select_one(selector)
+    if not name_element:
+        return False, None
+    text = name_element.get_text(strip=True)
+    if not text or len(text) <= 1:
+        return False, None
+    # Look for patterns like "Welcome, John Doe" or "John Doe"
+    if ',' in text:
+        return True, text.split(',')[1].strip()
+    if text.lower().startswith('welcome'):
+        return True, None
+    return True, text
+
+
+@profiled("extract user_name")
+def _extract_user_name(soup: bs4.BeautifulSoup, email: str = None, page_type: str = 'dashboard') -> str:
+    """Find the user's display name on a Tabroom page, falling back to the email"""
+    user_name = "User"
+    plan_name = f'{page_type}.user_name'
+    try:
+        # Try the selector that worked last time before searching them all
+        plan = _extraction_plans.get(plan_name)
+        name = _name_from_selector(soup, plan)[1] if plan is not None else None
+        if name:
+            _extraction_plans.hit(plan_name)
+            user_name = name
+        else:
+            _extraction_plans.miss(plan_name)
+            for selector in _NAME_SELECTORS:
+                matched, name = _name_from_selector(soup, selector)
+                if matched:
+                    if name:
+                        user_name = name
+                        _extraction_plans.learn(plan_name, selector)
+                    break
+        
+        # If we still don't have a good name, try to use email as fallback
+        if user_name == "User" and email:
+            user_name = _email_display_name(email)
+                
+    except Exception as e:
+        print(f"Error extracting username: {e}")
+        # Use email as fallback
+        if email:
+            user_name = _email_display_name(email)
+    return user_name
+
+
+def _parse_user_info(content: bytes, encoding: Optional[str], email: str = None) -> dict:
+    return {'user_name': _extract_user_name(_make_soup(content, encoding), email, 'user_info')}
+
+
 def extract_user_info_from_dashboard(session: requests.Session, email: str = None) -> dict:
     """Extract user information from the dashboard page"""
     try:
-        response = session.get(DASHBOARD_URL, timeout=20)
+        response = upstream_get(session, DASHBOARD_URL)
         response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract user info - try multiple selectors
-        user_name = "User"
-        try:
-            # Try various selectors for username
-            name_selectors = [
-                'span.username', 'div.userinfo', '.user-name', '.username',
-                'span[class*="user"]', 'div[class*="user"]',
-                'h1', 'h2', '.welcome', '.greeting'
-            ]
-            
-            for selector in name_selectors:
-                name_element = soup.select_one(selector)
-                if name_element:
-                    text = name_element.get_text(strip=True)
-                    # Look for patterns like "Welcome, John Doe" or "John Doe"
-                    if text and len(text) > 1 and not text.lower().startswith('welcome'):
-                        # Extract name from "Welcome, John Doe" or just use the text
-                        if ',' in text:
-                            user_name = text.split(',')[1].strip()
-                        else:
-                            user_name = text
-                        break
-                    elif text and len(text) > 1 and text.lower().startswith('welcome'):
-                        # Extract name from "Welcome, John Doe"
-                        if ',' in text:
-                            user_name = text.split(',')[1].strip()
-                        break
-            
-            # If we still don't have a good name, try to use email as fallback
-            if user_name == "User" and email:
-                # Extract name from email (before @)
-                if '@' in email:
-                    user_name = email.split('@')[0].replace('.', ' ').title()
-                else:
-                    user_name = email
-                    
-        except Exception as e:
-            print(f"Error extracting username: {e}")
-            # Use email as fallback
-            if email and '@' in email:
-                user_name = email.split('@')[0].replace('.', ' ').title()
-            elif email:
-                user_name = email
-        
-        return {'user_name': user_name}
+        return parse_page('user_info', _parse_user_info, response.content, response.encoding, email)
     except Exception as e:
         print(f"Error extracting user info: {e}")
         # Use email as fallback
-        if email and '@' in email:
-            user_name = email.split('@')[0].replace('.', ' ').title()
-        elif email:
-            user_name = email
-        else:
-            user_name = 'User'
-        return {'user_name': user_name}
+        return {'user_name': _email_display_name(email)}
+
+
+PUBLIC_API_HOST = "https://api.tabroom.com"
+
+_public_session = None
+_public_session_lock = threading.Lock()
+
+
+def _get_public_session() -> requests.Session:
+    """
+    Shared keep-alive session for the public (unauthenticated) API, so calls reuse pooled
+    connections. It never stores cookies, since it's shared between users.
+    """
+    global _public_session
+    with _public_session_lock:
+        if _public_session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=UPSTREAM_MAX_CONCURRENCY)
+            session.mount("https://", adapter)
+            _public_session = session
+        return _public_session
+
+
+def warm_up(connections: int = 2) -> None:
+    """Open `connections` pooled connections to the public API"""
+    session = _get_public_session()
+    with ThreadPoolExecutor(max_workers=max(1, connections)) as pool:
+        for future in [pool.submit(upstream_request, session, "HEAD", PUBLIC_API_HOST + "/") for _ in range(connections)]:
+            try:
+                future.result().close()
+            except Exception as e:
+                print(f"Could not pre-open connection to {PUBLIC_API_HOST}: {e}")
 
 
 def list_upcoming_tournaments():
     """Get upcoming tournaments from Tabroom API"""
     try:
-        response = requests.get('https://api.tabroom.com/v1/public/invite/upcoming', 
-                              headers=DEFAULT_HEADERS, timeout=20)
+        response = upstream_get(_get_public_session(), 'https://api.tabroom.com/v1/public/invite/upcoming', 
+                              headers=DEFAULT_HEADERS)
         response.raise_for_status()
         data = response.json()
         
@@ -192,7 +446,9 @@ def list_upcoming_tournaments():
                     'location': None,
                     'startDate': item.get('start'),
                     'endDate': item.get('end'),
-                    'webname': item.get('webname')
+                    'webname': item.get('webname'),
+                    'city': item.get('city'),
+                    'state': item.get('state')
                 }
                 
                 # Build location string
@@ -204,6 +460,8 @@ def list_upcoming_tournaments():
                 tournaments.append(tournament)
         
         return tournaments
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         print(f"Error fetching upcoming tournaments: {e}")
         return []
@@ -216,7 +474,7 @@ def search_tournaments(query: str, time: str = "both"):
         encoded_query = requests.utils.quote(query)
         url = f'https://api.tabroom.com/v1/public/search/{time}/{encoded_query}'
         
-        response = requests.get(url, headers=DEFAULT_HEADERS, timeout=20)
+        response = upstream_get(_get_public_session(), url, endpoint='api.tabroom.com/v1/public/search', headers=DEFAULT_HEADERS)
         response.raise_for_status()
         data = response.json()
         
@@ -242,6 +500,8 @@ def search_tournaments(query: str, time: str = "both"):
                 tournaments.append(tournament)
         
         return tournaments
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         print(f"Error searching tournaments: {e}")
         return []
@@ -250,8 +510,8 @@ def search_tournaments(query: str, time: str = "both"):
 def fetch_tournament_details(tournament_id: str):
     """Get detailed information about a specific tournament from Tabroom API"""
     try:
-        response = requests.get(f'https://api.tabroom.com/v1/public/invite/tourn/{tournament_id}', 
-                              headers=DEFAULT_HEADERS, timeout=20)
+        response = upstream_get(_get_public_session(), f'https://api.tabroom.com/v1/public/invite/tourn/{tournament_id}', 
+                              headers=DEFAULT_HEADERS)
         response.raise_for_status()
         data = response.json()
         
@@ -278,16 +538,141 @@ def fetch_tournament_details(tournament_id: str):
             tournament['location'] = ', '.join(filter(None, [city, state]))
         
         return tournament
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         print(f"Error fetching tournament details for {tournament_id}: {e}")
         return None
 
 
+# Tournament details are also served as separate sub-resources (summary, events, invite)
+# so header cards and event lookups don't carry the invite HTML around.
+INVITE_HTML_MAX_CHARS = 100_000
+# Invite HTML is sanitized against an allowlist: other tags are unwrapped (text kept),
+# except these, which are dropped with their contents
+_INVITE_ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'caption', 'center', 'code', 'col', 'colgroup', 'dd', 'div', 'dl',
+    'dt', 'em', 'font', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 's',
+    'small', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+_INVITE_DROP_TAGS = {
+    'script', 'style', 'iframe', 'frame', 'frameset', 'object', 'embed', 'applet', 'form', 'input', 'button',
+    'select', 'textarea', 'link', 'meta', 'base', 'svg', 'math', 'template', 'noscript', 'head', 'title',
+}
+_INVITE_ALLOWED_ATTRS = {
+    '*': {'title', 'align'},
+    'a': {'href'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan'},
+    'table': {'border', 'cellpadding', 'cellspacing', 'width'},
+    'ol': {'start'},
+    'font': {'color', 'size'},
+}
+_INVITE_URL_ATTRS = {'href': ('http', 'https', 'mailto', 'tel'), 'src': ('http', 'https')}
+# Browsers ignore control characters and whitespace inside a URL scheme ("java\tscript:")
+_URL_IGNORED_CHARS_RE = re.compile(r'[\x00-\x20\x7f-\x9f]+')
+
+
+def tournament_summary(tournament: dict) -> dict:
+    """Header-card fields of a tournament details dict"""
+    summary = {key: tournament.get(key) for key in ('id', 'name', 'location', 'startDate', 'endDate', 'webname', 'websiteUrl')}
+    summary['eventCount'] = len(tournament.get('events') or [])
+    summary['hasInvite'] = bool(tournament.get('infoHtml'))
+    return summary
+
+
+def normalize_tournament_events(raw_events: list) -> dict:
+    """
+    Normalize Tabroom's event objects and index them by event ID and abbreviation
+    (abbreviations are matched case-insensitively). Positions refer to `events`.
+    """
+    events, by_id, by_abbr = [], {}, {}
+    for raw in raw_events or []:
+        if not isinstance(raw, dict):
+            continue
+        event = {
+            'id': str(raw['id']) if raw.get('id') is not None else None,
+            'abbr': (raw.get('abbr') or '').strip() or None,
+            'name': (raw.get('name') or '').strip() or None,
+            'type': raw.get('type'),
+            'level': raw.get('level'),
+            'description': raw.get('description'),
+        }
+        position = len(events)
+        events.append(event)
+        if event['id']:
+            by_id.setdefault(event['id'], position)
+        if event['abbr']:
+            by_abbr.setdefault(event['abbr'].lower(), position)
+    return {'events': events, 'byId': by_id, 'byAbbr': by_abbr}
+
+
+def _safe_url(value: str, schemes: Tuple[str, ...]) -> Optional[str]:
+    """The URL with ignored characters removed, or None if its scheme isn't allowed"""
+    url = _URL_IGNORED_CHARS_RE.sub('', value)
+    # Anything with a colon before the path/query/fragment has a scheme and must be allowlisted
+    head = re.split(r'[/?#]', url, maxsplit=1)[0]
+    if ':' in head and head.split(':', 1)[0].lower() not in schemes:
+        return None
+    return url
+
+
+def _clean_invite_soup(soup) -> None:
+    for comment in soup.find_all(string=lambda text: isinstance(text, (bs4.Comment, bs4.Declaration, bs4.ProcessingInstruction))):
+        comment.extract()
+    for tag in soup.find_all(True):
+        if tag.decomposed:
+            continue
+        name = tag.name.lower()
+        if name in _INVITE_DROP_TAGS:
+            tag.decompose()
+            continue
+        if name not in _INVITE_ALLOWED_TAGS:
+            tag.unwrap()
+            continue
+        allowed = _INVITE_ALLOWED_ATTRS['*'] | _INVITE_ALLOWED_ATTRS.get(name, set())
+        for attr in list(tag.attrs):
+            value = tag.attrs[attr]
+            if attr.lower() not in allowed or not isinstance(value, str):
+                del tag.attrs[attr]
+            elif attr.lower() in _INVITE_URL_ATTRS:
+                url = _safe_url(value, _INVITE_URL_ATTRS[attr.lower()])
+                if url is None:
+                    del tag.attrs[attr]
+                else:
+                    tag.attrs[attr] = url
+
+
+def sanitize_invite_html(html: Optional[str], max_chars: int = INVITE_HTML_MAX_CHARS) -> dict:
+    """Reduce invite HTML to allowlisted tags and attributes and cap its size, closing any tags the cut left open"""
+    if not html:
+        return {'html': None, 'truncated': False, 'originalLength': 0}
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    _clean_invite_soup(soup)
+    full = cleaned = str(soup)
+    truncated = len(full) > max_chars
+    limit = max_chars
+    while len(cleaned) > max_chars and limit > 0:
+        cut = full[:limit]
+        # Don't leave half a tag at the end; re-parsing closes whatever is still open
+        if cut.rfind('<') > cut.rfind('>'):
+            cut = cut[:cut.rfind('<')]
+        soup = bs4.BeautifulSoup(cut, 'html.parser')
+        _clean_invite_soup(soup)
+        cleaned = str(soup)
+        # The closing tags added back can push it over the cap again; cut deeper by the overflow
+        limit -= max(1, len(cleaned) - max_chars)
+    if len(cleaned) > max_chars:
+        cleaned = ''
+    return {'html': cleaned, 'truncated': truncated, 'originalLength': len(html)}
+
+
 def login_tabroom_debug(email: str, password: str):
     session = requests.Session()
     session.headers.update(DEFAULT_HEADERS)
-    get_resp = session.get(LOGIN_URL, allow_redirects=True, timeout=20)
-    soup = BeautifulSoup(get_resp.text, 'html.parser')
+    get_resp = upstream_get(session, LOGIN_URL, allow_redirects=True)
+    soup = bs4.BeautifulSoup(get_resp.text, 'html.parser')
     inputs = []
     for inp in soup.find_all('input'):
         inputs.append({
@@ -299,12 +684,12 @@ def login_tabroom_debug(email: str, password: str):
         'email': '***',
         'password': '***',
     }
-    post_resp = session.post(LOGIN_URL, data=payload, allow_redirects=True, timeout=20, headers={**DEFAULT_HEADERS, "Origin": "https://www.tabroom.com"})
+    post_resp = upstream_post(session, LOGIN_URL, data=payload, allow_redirects=True, headers={**DEFAULT_HEADERS, "Origin": "https://www.tabroom.com"})
     return {
         'get_status': get_resp.status_code,
         'post_status': post_resp.status_code,
         'final_url': post_resp.url,
-        'cookies': dict_from_cookiejar(session.cookies),
+        'cookies': requests.utils.dict_from_cookiejar(session.cookies),
         'inputs': inputs[:20],
     }
 
@@ -314,7 +699,7 @@ def fetch_ballots(token: str) -> str:
     Fetches ballot page HTML for the authenticated user.
     """
     headers = {**DEFAULT_HEADERS, "Cookie": f"TabroomToken={token}"}
-    response = requests.get(BALLOT_URL, headers=headers, allow_redirects=True, timeout=20)
+    response = _authenticated_get(requests, BALLOT_URL, token, headers=headers)
 
     if response.status_code == 200:
         return response.text
@@ -322,6 +707,99 @@ def fetch_ballots(token: str) -> str:
         raise Exception(f"Failed to fetch ballots: {response.status_code}")
 
 
+def _parse_ballots(content: bytes, encoding: Optional[str]) -> List[dict]:
+    """Parse the results table on the ballots page into one entry per tournament, newest first"""
+    soup = _make_soup(content, encoding)
+    # Find the results table by header labels
+    results_table = None
+    for table in soup.find_all('table'):
+        headers = [th.get_text(strip=True).lower() for th in table.select('thead th')]
+        if 'tourn' in headers and 'date' in headers:
+            results_table = table
+            break
+    
+    entries = []
+    if results_table is None:
+        return entries
+    for tr in results_table.select('tbody > tr'):
+        tds = tr.find_all('td')
+        if len(tds) < 5:
+            continue
+        tourn_anchor = tds[0].find('a')
+        result_anchor = tds[4].find('a')
+        raw_date = tds[1].get('data-text') or tds[1].get_text(strip=True)
+        entries.append({
+            'tournName': (tourn_anchor.get_text(strip=True) if tourn_anchor else '') or tds[0].get_text(strip=True),
+            'tournUrl': urljoin(BALLOT_URL, tourn_anchor['href']) if tourn_anchor and tourn_anchor.get('href') else None,
+            'dateIso': raw_date.replace(' ', 'T', 1) if raw_date else None,
+            'code': tds[2].get_text(strip=True),
+            'division': tds[3].get_text(strip=True),
+            'resultUrl': urljoin(BALLOT_URL, result_anchor['href']) if result_anchor and result_anchor.get('href') else None,
+        })
+    entries.sort(key=lambda e: e['dateIso'] or '', reverse=True)
+    return entries
+
+
+def fetch_parsed_ballots(token: str) -> List[dict]:
+    """Fetch the ballots page and return its parsed result entries"""
+    headers = {**DEFAULT_HEADERS, "Cookie": f"TabroomToken={token}"}
+    response = _authenticated_get(requests, BALLOT_URL, token, headers=headers)
+    if response.status_code != 200:
+        raise Exception(f"Failed to fetch ballots: {response.status_code}")
+    return parse_page('ballots', _parse_ballots, response.content, response.encoding)
+
+
+# Column headers on a competitor's result page, matched by keyword
+_ROUND_COLUMNS = {
+    'round': re.compile(r'^(round|rd)'),
+    'side': re.compile(r'side'),
+    'opponent': re.compile(r'opp'),
+    'judge': re.compile(r'judge'),
+    'result': re.compile(r'result|decision|dec\b|w/l|ballot'),
+}
+
+
+def _parse_result_rounds(content: bytes, encoding: Optional[str]) -> List[dict]:
+    """Parse per-round records (round, side, opponent, judge, W/L) from an entry's result page"""
+    soup = _make_soup(content, encoding)
+    rounds = []
+    for table in soup.find_all('table'):
+        header_text = _table_header(table)
+        if header_text is None:
+            continue
+        columns = {}
+        for field, pattern in _ROUND_COLUMNS.items():
+            for i, text in enumerate(header_text):
+                if pattern.search(text):
+                    columns[field] = i
+                    break
+        # Need at least a round label and an outcome to count anything
+        if 'round' not in columns or 'result' not in columns:
+            continue
+        for tr in table.find_all('tr')[1:]:
+            cells = [' '.join(td.get_text(' ', strip=True).split()) for td in tr.find_all(['td', 'th'])]
+            if len(cells) <= max(columns.values()):
+                continue
+            outcome = cells[columns['result']][:1].upper()
+            rounds.append({
+                'round': cells[columns['round']],
+                'side': cells[columns['side']] if 'side' in columns else None,
+                'opponent': cells[columns['opponent']] if 'opponent' in columns else None,
+                'judge': cells[columns['judge']] if 'judge' in columns else None,
+                'result': outcome if outcome in ('W', 'L') else None,
+            })
+    return rounds
+
+
+def fetch_result_rounds(token: str, result_url: str) -> List[dict]:
+    """Fetch one entry's result page and return its rounds"""
+    headers = {**DEFAULT_HEADERS, "Cookie": f"TabroomToken={token}"}
+    response = _authenticated_get(requests, result_url, token, headers=headers)
+    if response.status_code != 200:
+        raise Exception(f"Failed to fetch results: {response.status_code}")
+    return parse_page('result_rounds', _parse_result_rounds, response.content, response.encoding)
+
+
 def fetch_authenticated_json(token: str, url: str, cookie_name: str = "TabroomToken"):
     """
     Fetches JSON from a Tabroom endpoint using the provided TabroomToken cookie.
@@ -331,7 +809,7 @@ def fetch_authenticated_json(token: str, url: str, cookie_name: str = "TabroomTo
         "Accept": "application/json, text/plain, */*",
         "Cookie": f"{cookie_name}={token}",
     }
-    resp = requests.get(url, headers=headers, allow_redirects=True, timeout=20)
+    resp = upstream_get(requests, url, headers=headers, allow_redirects=True)
     if resp.status_code == 200:
         return resp.json()
     raise Exception(f"Failed to fetch json: {resp.status_code}")
@@ -430,6 +908,107 @@ def browser_login_via_home_popup(email: str, password: str, headless: bool = Tru
         return token, cookie_name
 
 
+@profiled("extract stats")
+def _extract_dashboard_stats(soup: bs4.BeautifulSoup) -> dict:
+    # Extract stats (these are common elements on Tabroom dashboard)
+    stats = {
+        'active_tournaments': 0,
+        'upcoming_rounds': 0,
+        'ballots_to_judge': 0,
+        'reminders': 0
+    }
+    
+    # Look for common dashboard elements with better parsing
+    try:
+        # Look for tournament-related content
+        tournament_links = soup.find_all('a', href=lambda x: x and ('tournament' in x or 'tourn' in x))
+        tournament_text = soup.find_all(text=lambda x: x and ('tournament' in x.lower() or 'tourn' in x.lower()))
+        stats['active_tournaments'] = max(len(tournament_links), len([t for t in tournament_text if len(t.strip()) > 5]))
+        
+        # Look for ballot-related content
+        ballot_links = soup.find_all('a', href=lambda x: x and 'ballot' in x.lower())
+        ballot_text = soup.find_all(text=lambda x: x and 'ballot' in x.lower())
+        stats['ballots_to_judge'] = max(len(ballot_links), len([b for b in ballot_text if 'judge' in b.lower() or 'pending' in b.lower()]))
+        
+        # Look for round-related content
+        round_text = soup.find_all(text=lambda x: x and ('round' in x.lower() or 'upcoming' in x.lower()))
+        stats['upcoming_rounds'] = len([r for r in round_text if len(r.strip()) > 3])
+        
+        # Look for reminder/notification content
+        reminder_text = soup.find_all(text=lambda x: x and ('reminder' in x.lower() or 'notification' in x.lower() or 'alert' in x.lower()))
+        stats['reminders'] = len([r for r in reminder_text if len(r.strip()) > 3])
+        
+        # If we still have 0s, try to find any numbers in the page that might be stats
+        if all(v == 0 for v in stats.values()):
+            # Look for any numbers that might be stats
+            number_elements = soup.find_all(text=lambda x: x and x.strip().isdigit() and int(x.strip()) > 0)
+            if number_elements:
+                # Use the first few numbers as stats
+                numbers = [int(n.strip()) for n in number_elements[:4]]
+                stats['active_tournaments'] = numbers[0] if len(numbers) > 0 else 0
+                stats['ballots_to_judge'] = numbers[1] if len(numbers) > 1 else 0
+                stats['upcoming_rounds'] = numbers[2] if len(numbers) > 2 else 0
+                stats['reminders'] = numbers[3] if len(numbers) > 3 else 0
+        
+    except Exception as e:
+        print(f"Error extracting stats: {e}")
+        pass
+    return stats
+
+
+@profiled("extract recent_activity")
+def _extract_recent_activity(soup: bs4.BeautifulSoup) -> list:
+    # Extract recent activity
+    recent_activity = []
+    try:
+        # Look for activity items (this is a simplified approach)
+        activity_items = soup.find_all('div', class_='activity') or soup.find_all('li', class_='activity')
+        for item in activity_items[:5]:  # Limit to 5 recent items
+            text = item.get_text(strip=True)
+            if text:
+                recent_activity.append({
+                    'text': text,
+                    'time': 'Recently'  # Tabroom doesn't always show timestamps
+                })
+    except:
+        pass
+    return recent_activity
+
+
+def _parse_dashboard(content: bytes, encoding: Optional[str], url: str, status_code: int, email: str = None) -> dict:
+    """Extract user name, stats and recent activity from the dashboard page"""
+    soup = _make_soup(content, encoding)
+    
+    # DEBUG: Let's see what we're actually getting from Tabroom
+    print("=== TABROOM DASHBOARD DEBUG ===")
+    print(f"Response status: {status_code}")
+    print(f"Response URL: {url}")
+    print(f"Page title: {soup.title.string if soup.title else 'No title'}")
+    print(f"Page length: {len(content)} bytes")
+    
+    # Look for any text that might contain user info
+    page_text = soup.get_text()
+    print(f"Page contains 'welcome': {'welcome' in page_text.lower()}")
+    print(f"Page contains 'user': {'user' in page_text.lower()}")
+    print(f"First 500 chars of page: {page_text[:500]}")
+    
+    user_name = _extract_user_name(soup, email)
+    
+    stats = _extract_dashboard_stats(soup)
+    recent_activity = _extract_recent_activity(soup)
+    
+    result = {
+        'user_name': user_name,
+        'stats': stats,
+        'recent_activity': recent_activity
+    }
+    
+    # Debug logging
+    print(f"Dashboard data extracted - User: {user_name}, Stats: {stats}")
+    
+    return result
+
+
 def fetch_dashboard_data(token: str, email: str = None) -> dict:
     """Fetch user dashboard data from Tabroom"""
     try:
@@ -440,145 +1019,227 @@ def fetch_dashboard_data(token: str, email: str = None) -> dict:
         session.cookies.set('TabroomToken', token)
         
         # Fetch dashboard page
-        response = session.get(DASHBOARD_URL, timeout=20)
+        response = _authenticated_get(session, DASHBOARD_URL, token)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return parse_page('dashboard', _parse_dashboard, response.content, response.encoding, response.url, response.status_code, email)
         
-        # DEBUG: Let's see what we're actually getting from Tabroom
-        print("=== TABROOM DASHBOARD DEBUG ===")
-        print(f"Response status: {response.status_code}")
-        print(f"Response URL: {response.url}")
-        print(f"Page title: {soup.title.string if soup.title else 'No title'}")
-        print(f"Page length: {len(response.text)} characters")
+    except (UpstreamUnavailable, SessionExpired):
+        raise
+    except Exception as e:
+        print(f"Error fetching dashboard data: {e}")
+        return {
+            'user_name': 'User',
+            'stats': {'active_tournaments': 0, 'upcoming_rounds': 0, 'ballots_to_judge': 0, 'reminders': 0},
+            'recent_activity': []
+        }
+
+
+# Tournament row classification. Patterns are compiled once at import time and
+# date strings are memoized, since coach pages repeat the same few dates many times.
+_ROW_DATE_FORMATS = ('%b %d, %Y', '%b %d %Y')
+_NAME_LIKE_DATE_RE = re.compile(r'swing|classic|tournament|tfa|ni|etoc', re.IGNORECASE)
+_ENTRY_CONFIRMED_RE = re.compile(r'confirmed|waitlisted', re.IGNORECASE)
+_TOURNAMENT_HEADER_RE = re.compile(r'tournament|event|date|status|name')
+_FUTURE_ROW_RE = re.compile(r'confirmed|waitlisted|upcoming|future', re.IGNORECASE)
+_NON_EVENT_TEXT = frozenset(['info', 'details', 'view', ''])
+
+
+@lru_cache(maxsize=2048)
+def _parse_row_date(date_text: str) -> Optional[date]:
+    """Parse a tournament row date like 'Oct 4, 2025'; returns None when unparseable"""
+    # Handle different date formats
+    fmt = _ROW_DATE_FORMATS[0] if ',' in date_text else _ROW_DATE_FORMATS[1]
+    try:
+        return datetime.strptime(date_text, fmt).date()
+    except ValueError:
+        return None
+
+
+def _extract_tournament_row(cols) -> Tuple[str, str, Optional[str], str]:
+    """Pull (name, date, event, status) text out of a tournament table row"""
+    # Extract tournament name
+    name_elem = cols[0].find('a') or cols[0]
+    name = name_elem.get_text(strip=True)
+    
+    # Extract date
+    date_text = cols[1].get_text(strip=True)
+    
+    # Extract event
+    event_text = cols[2].get_text(strip=True) if len(cols) > 2 else None
+    
+    # Extract status - try different column positions
+    status_text = 'Upcoming'
+    if len(cols) > 4:
+        status_text = cols[4].get_text(strip=True)
+    elif len(cols) > 3:
+        status_text = cols[3].get_text(strip=True)
+    
+    return name, date_text, event_text, status_text
+
+
+@profiled("classify tournament rows")
+def _classify_tournament_rows(raw_rows: List[Tuple[str, str, Optional[str], str]], today: date) -> List[dict]:
+    """
+    Classify extracted tournament rows in one batch and return the future ones.
+    Each distinct date string is parsed once per batch; `today` is computed once by the caller.
+    """
+    parsed_dates = {}
+    for _, date_text, _, _ in raw_rows:
+        if date_text and date_text != 'TBD' and date_text not in parsed_dates:
+            # Skip if date looks like a tournament name (contains common tournament words)
+            if _NAME_LIKE_DATE_RE.search(date_text):
+                parsed_dates[date_text] = False
+            else:
+                parsed_dates[date_text] = _parse_row_date(date_text)
+    
+    tournaments = []
+    for name, date_text, event_text, status_text in raw_rows:
+        # Only include future tournaments (not completed ones)
+        if not name or len(name) <= 3:
+            continue
         
-        # Look for any text that might contain user info
-        page_text = soup.get_text()
-        print(f"Page contains 'welcome': {'welcome' in page_text.lower()}")
-        print(f"Page contains 'user': {'user' in page_text.lower()}")
-        print(f"First 500 chars of page: {page_text[:500]}")
+        iso_date = None
+        if date_text and date_text != 'TBD':
+            tournament_date = parsed_dates[date_text]
+            if tournament_date is False:
+                print(f"Skipping tournament with invalid date (looks like name): {name} - {date_text}")
+                continue
+            if tournament_date is None:
+                # If we can't parse the date, be conservative and skip it
+                print(f"Could not parse date '{date_text}' for tournament '{name}'")
+                continue
+            if tournament_date < today:
+                continue
+            if tournament_date == today and not _ENTRY_CONFIRMED_RE.search(status_text):
+                # Only include today's tournaments if they're confirmed/waitlisted
+                continue
+            iso_date = datetime.combine(tournament_date, datetime.min.time()).isoformat()
         
-        # Extract user info - try multiple selectors
-        user_name = "User"
-        try:
-            # Try various selectors for username
-            name_selectors = [
-                'span.username', 'div.userinfo', '.user-name', '.username',
-                'span[class*="user"]', 'div[class*="user"]',
-                'h1', 'h2', '.welcome', '.greeting'
-            ]
-            
-            for selector in name_selectors:
-                name_element = soup.select_one(selector)
-                if name_element:
-                    text = name_element.get_text(strip=True)
-                    # Look for patterns like "Welcome, John Doe" or "John Doe"
-                    if text and len(text) > 1 and not text.lower().startswith('welcome'):
-                        # Extract name from "Welcome, John Doe" or just use the text
-                        if ',' in text:
-                            user_name = text.split(',')[1].strip()
-                        else:
-                            user_name = text
-                        break
-                    elif text and len(text) > 1 and text.lower().startswith('welcome'):
-                        # Extract name from "Welcome, John Doe"
-                        if ',' in text:
-                            user_name = text.split(',')[1].strip()
-                        break
-            
-            # If we still don't have a good name, try to use email as fallback
-            if user_name == "User" and email:
-                # Extract name from email (before @)
-                if '@' in email:
-                    user_name = email.split('@')[0].replace('.', ' ').title()
-                else:
-                    user_name = email
-                    
-        except Exception as e:
-            print(f"Error extracting username: {e}")
-            # Use email as fallback
-            if email and '@' in email:
-                user_name = email.split('@')[0].replace('.', ' ').title()
-            elif email:
-                user_name = email
+        # Clean up event text - remove extra whitespace and newlines
+        event = None
+        if event_text and event_text != 'TBD' and event_text.strip():
+            event = ' '.join(event_text.split())
+            # Remove common non-event text
+            if event.lower() in _NON_EVENT_TEXT:
+                event = None
         
-        # Extract stats (these are common elements on Tabroom dashboard)
-        stats = {
-            'active_tournaments': 0,
-            'upcoming_rounds': 0,
-            'ballots_to_judge': 0,
-            'reminders': 0
-        }
+        # Determine status
+        if 'Confirmed' in status_text:
+            status = 'Confirmed'
+        elif 'Waitlisted' in status_text:
+            status = 'Waitlisted'
+        else:
+            status = 'Upcoming'
         
-        # Look for common dashboard elements with better parsing
-        try:
-            # Look for tournament-related content
-            tournament_links = soup.find_all('a', href=lambda x: x and ('tournament' in x or 'tourn' in x))
-            tournament_text = soup.find_all(text=lambda x: x and ('tournament' in x.lower() or 'tourn' in x.lower()))
-            stats['active_tournaments'] = max(len(tournament_links), len([t for t in tournament_text if len(t.strip()) > 5]))
-            
-            # Look for ballot-related content
-            ballot_links = soup.find_all('a', href=lambda x: x and 'ballot' in x.lower())
-            ballot_text = soup.find_all(text=lambda x: x and 'ballot' in x.lower())
-            stats['ballots_to_judge'] = max(len(ballot_links), len([b for b in ballot_text if 'judge' in b.lower() or 'pending' in b.lower()]))
-            
-            # Look for round-related content
-            round_text = soup.find_all(text=lambda x: x and ('round' in x.lower() or 'upcoming' in x.lower()))
-            stats['upcoming_rounds'] = len([r for r in round_text if len(r.strip()) > 3])
-            
-            # Look for reminder/notification content
-            reminder_text = soup.find_all(text=lambda x: x and ('reminder' in x.lower() or 'notification' in x.lower() or 'alert' in x.lower()))
-            stats['reminders'] = len([r for r in reminder_text if len(r.strip()) > 3])
-            
-            # If we still have 0s, try to find any numbers in the page that might be stats
-            if all(v == 0 for v in stats.values()):
-                # Look for any numbers that might be stats
-                number_elements = soup.find_all(text=lambda x: x and x.strip().isdigit() and int(x.strip()) > 0)
-                if number_elements:
-                    # Use the first few numbers as stats
-                    numbers = [int(n.strip()) for n in number_elements[:4]]
-                    stats['active_tournaments'] = numbers[0] if len(numbers) > 0 else 0
-                    stats['ballots_to_judge'] = numbers[1] if len(numbers) > 1 else 0
-                    stats['upcoming_rounds'] = numbers[2] if len(numbers) > 2 else 0
-                    stats['reminders'] = numbers[3] if len(numbers) > 3 else 0
+        tournaments.append({
+            'id': f"tournament_{len(tournaments) + 1}",
+            'name': name,
+            'status': status,
+            'dateIso': iso_date,
+            'event': event
+        })
+    
+    return tournaments
+
+
+def _table_header(table) -> Optional[Tuple[str, ...]]:
+    """Lowercased header cells of a table with at least one data row, else None"""
+    rows = table.find_all('tr')
+    if len(rows) > 1:  # Has at least header + data rows
+        header_cols = rows[0].find_all(['td', 'th'])
+        return tuple(col.get_text(strip=True).lower() for col in header_cols)
+    return None
+
+
+@profiled("extract tournament_table")
+def _find_tournament_table(tables):
+    """Pick the tournament table, trying the last table position/header that worked first"""
+    plan = _extraction_plans.get('user_tournaments.table')
+    if plan is not None:
+        position, signature = plan
+        if position < len(tables) and _table_header(tables[position]) == signature:
+            _extraction_plans.hit('user_tournaments.table')
+            return tables[position]
+    _extraction_plans.miss('user_tournaments.table')
+    
+    for i, table in enumerate(tables):
+        header_text = _table_header(table)
+        if header_text is not None:
+            # Check if this looks like a tournament table
+            print(f"Table {i} headers: {list(header_text)}")
             
-        except Exception as e:
-            print(f"Error extracting stats: {e}")
-            pass
-        
-        # Extract recent activity
-        recent_activity = []
-        try:
-            # Look for activity items (this is a simplified approach)
-            activity_items = soup.find_all('div', class_='activity') or soup.find_all('li', class_='activity')
-            for item in activity_items[:5]:  # Limit to 5 recent items
-                text = item.get_text(strip=True)
-                if text:
-                    recent_activity.append({
-                        'text': text,
-                        'time': 'Recently'  # Tabroom doesn't always show timestamps
-                    })
-        except:
-            pass
-        
-        result = {
-            'user_name': user_name,
-            'stats': stats,
-            'recent_activity': recent_activity
-        }
+            # Look for tournament-related headers
+            if _TOURNAMENT_HEADER_RE.search(' '.join(header_text)):
+                print(f"Using table {i} as tournament table")
+                _extraction_plans.learn('user_tournaments.table', (i, header_text))
+                return table
+    return None
+
+
+def _parse_user_tournaments(content: bytes, encoding: Optional[str], url: str, status_code: int, today: date) -> list:
+    """Find the tournament table on the competitor page and return the future entries"""
+    soup = _make_soup(content, encoding)
+    tournaments = []
+    
+    print("=== FETCHING USER TOURNAMENTS DEBUG ===")
+    print(f"Response status: {status_code}")
+    print(f"Response URL: {url}")
+    
+    # Look for tournament tables in different ways
+    tables = soup.find_all('table')
+    print(f"Found {len(tables)} tables on the page")
+    
+    tournament_table = _find_tournament_table(tables)
+    
+    if tournament_table:
+        rows = tournament_table.find_all('tr')
+        print(f"Found {len(rows)} rows in tournament table")
         
-        # Debug logging
-        print(f"Dashboard data extracted - User: {user_name}, Stats: {stats}")
+        # Debug: Print header row to understand structure
+        if len(rows) > 0:
+            header_cols = rows[0].find_all(['td', 'th'])
+            print(f"Header columns: {[col.get_text(strip=True) for col in header_cols]}")
         
-        return result
+        # Pull the raw cell text out of the soup first, then classify every row in one batch
+        raw_rows = []
+        for i, row in enumerate(rows[1:], 1):  # Skip header row
+            cols = row.find_all(['td', 'th'])
+            if len(cols) >= 3:  # At least Tournament, Date, Status
+                try:
+                    raw_rows.append(_extract_tournament_row(cols))
+                except Exception as e:
+                    print(f"Error processing tournament row {i}: {e}")
+                    continue
         
-    except Exception as e:
-        print(f"Error fetching dashboard data: {e}")
-        return {
-            'user_name': 'User',
-            'stats': {'active_tournaments': 0, 'upcoming_rounds': 0, 'ballots_to_judge': 0, 'reminders': 0},
-            'recent_activity': []
-        }
+        tournaments.extend(_classify_tournament_rows(raw_rows, today))
+    
+    # If no future tournaments found in the specific section, try a more general approach
+    if not tournaments:
+        print("No future tournaments found in specific section, trying general search...")
+        # Look for any tournament tables
+        tables = soup.find_all('table')
+        for table in tables:
+            rows = table.find_all('tr')
+            for row in rows:
+                cols = row.find_all(['td', 'th'])
+                if len(cols) >= 3:
+                    name_elem = cols[0].find('a') or cols[0]
+                    name = name_elem.get_text(strip=True)
+                    
+                    if name and len(name) > 3 and 'tournament' not in name.lower():
+                        # Check if this looks like a future tournament
+                        if _FUTURE_ROW_RE.search(row.get_text()):
+                            tournaments.append({
+                                'id': f"tournament_{len(tournaments) + 1}",
+                                'name': name,
+                                'status': 'Upcoming',
+                                'dateIso': None,
+                                'event': None
+                            })
+    
+    print(f"Total future tournaments found: {len(tournaments)}")
+    return tournaments
 
 
 def fetch_user_tournaments(token: str) -> list:
@@ -589,174 +1250,13 @@ def fetch_user_tournaments(token: str) -> list:
         session.cookies.set('TabroomToken', token)
         
         # Try to fetch from the competitor records page which shows current/future tournaments
-        response = session.get("https://www.tabroom.com/user/student/index.mhtml", timeout=20)
+        response = _authenticated_get(session, USER_TOURNAMENTS_URL, token)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        tournaments = []
-        
-        print("=== FETCHING USER TOURNAMENTS DEBUG ===")
-        print(f"Response status: {response.status_code}")
-        print(f"Response URL: {response.url}")
-        
-        # Look for tournament tables in different ways
-        tables = soup.find_all('table')
-        print(f"Found {len(tables)} tables on the page")
-        
-        tournament_table = None
-        for i, table in enumerate(tables):
-            rows = table.find_all('tr')
-            if len(rows) > 1:  # Has at least header + data rows
-                # Check if this looks like a tournament table
-                header_cols = rows[0].find_all(['td', 'th'])
-                header_text = [col.get_text(strip=True).lower() for col in header_cols]
-                print(f"Table {i} headers: {header_text}")
-                
-                # Look for tournament-related headers
-                if any(keyword in ' '.join(header_text) for keyword in ['tournament', 'event', 'date', 'status', 'name']):
-                    tournament_table = table
-                    print(f"Using table {i} as tournament table")
-                    break
-        
-        if tournament_table:
-            rows = tournament_table.find_all('tr')
-            print(f"Found {len(rows)} rows in tournament table")
-            
-            # Debug: Print header row to understand structure
-            if len(rows) > 0:
-                header_cols = rows[0].find_all(['td', 'th'])
-                print(f"Header columns: {[col.get_text(strip=True) for col in header_cols]}")
-            
-            for i, row in enumerate(rows[1:], 1):  # Skip header row
-                cols = row.find_all(['td', 'th'])
-                print(f"Row {i}: {len(cols)} columns")
-                if len(cols) >= 3:  # At least Tournament, Date, Status
-                    try:
-                        # Extract tournament name
-                        name_elem = cols[0].find('a') or cols[0]
-                        name = name_elem.get_text(strip=True)
-                        
-                        # Extract date
-                        date_text = cols[1].get_text(strip=True)
-                        
-                        # Extract event - try different column positions
-                        event_text = None
-                        if len(cols) > 2:
-                            event_text = cols[2].get_text(strip=True)
-                        elif len(cols) > 3:
-                            event_text = cols[3].get_text(strip=True)
-                        
-                        # Extract status - try different column positions
-                        status_text = 'Upcoming'
-                        if len(cols) > 4:
-                            status_text = cols[4].get_text(strip=True)
-                        elif len(cols) > 3:
-                            status_text = cols[3].get_text(strip=True)
-                        
-                        print(f"  Tournament: {name}")
-                        print(f"  Date: {date_text}")
-                        print(f"  Event: {event_text}")
-                        print(f"  Status: {status_text}")
-                        
-                        # Only include future tournaments (not completed ones)
-                        if name and len(name) > 3:
-                            # Convert date to ISO format and check if it's in the future
-                            iso_date = None
-                            is_future = True
-                            
-                            if date_text and date_text != 'TBD':
-                                try:
-                                    from datetime import datetime
-                                    
-                                    # Skip if date looks like a tournament name (contains common tournament words)
-                                    if any(word in date_text.lower() for word in ['swing', 'classic', 'tournament', 'tfa', 'ni', 'etoc']):
-                                        print(f"Skipping tournament with invalid date (looks like name): {name} - {date_text}")
-                                        is_future = False
-                                    else:
-                                        # Handle different date formats
-                                        if ',' in date_text:
-                                            parsed_date = datetime.strptime(date_text, '%b %d, %Y')
-                                        else:
-                                            # Try other formats
-                                            parsed_date = datetime.strptime(date_text, '%b %d %Y')
-                                        iso_date = parsed_date.isoformat()
-                                        
-                                        # Only include future tournaments (at least 1 day in the future)
-                                        today = datetime.now().date()
-                                        tournament_date = parsed_date.date()
-                                        
-                                        if tournament_date < today:
-                                            print(f"Skipping past tournament: {name} - {date_text} (was on {tournament_date})")
-                                            is_future = False
-                                        elif tournament_date == today:
-                                            # Only include today's tournaments if they're confirmed/waitlisted
-                                            if 'confirmed' not in status_text.lower() and 'waitlisted' not in status_text.lower():
-                                                print(f"Skipping today's tournament (not confirmed): {name} - {date_text}")
-                                                is_future = False
-                                except ValueError as e:
-                                    print(f"Could not parse date '{date_text}' for tournament '{name}': {e}")
-                                    # If we can't parse the date, be conservative and skip it
-                                    is_future = False
-                            
-                            if is_future:
-                                # Clean up event text - remove extra whitespace and newlines
-                                event = None
-                                if event_text and event_text != 'TBD' and event_text.strip():
-                                    # Clean up the event text
-                                    event = ' '.join(event_text.split())  # Remove extra whitespace
-                                    # Remove common non-event text
-                                    if event.lower() in ['info', 'details', 'view', '']:
-                                        event = None
-                                
-                                # Determine status
-                                if 'Confirmed' in status_text:
-                                    status = 'Confirmed'
-                                elif 'Waitlisted' in status_text:
-                                    status = 'Waitlisted'
-                                else:
-                                    status = 'Upcoming'
-                                
-                                tournaments.append({
-                                    'id': f"tournament_{len(tournaments) + 1}",
-                                    'name': name,
-                                    'status': status,
-                                    'dateIso': iso_date,
-                                    'event': event
-                                })
-                                
-                                print(f"Found tournament: {name} - {status} - {date_text} - {event}")
-                    except Exception as e:
-                        print(f"Error processing tournament row {i}: {e}")
-                        continue
-        
-        # If no future tournaments found in the specific section, try a more general approach
-        if not tournaments:
-            print("No future tournaments found in specific section, trying general search...")
-            # Look for any tournament tables
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cols = row.find_all(['td', 'th'])
-                    if len(cols) >= 3:
-                        name_elem = cols[0].find('a') or cols[0]
-                        name = name_elem.get_text(strip=True)
-                        
-                        if name and len(name) > 3 and 'tournament' not in name.lower():
-                            # Check if this looks like a future tournament
-                            row_text = row.get_text().lower()
-                            if any(word in row_text for word in ['confirmed', 'waitlisted', 'upcoming', 'future']):
-                                tournaments.append({
-                                    'id': f"tournament_{len(tournaments) + 1}",
-                                    'name': name,
-                                    'status': 'Upcoming',
-                                    'dateIso': None,
-                                    'event': None
-                                })
-        
-        print(f"Total future tournaments found: {len(tournaments)}")
-        return tournaments
+        return parse_page('user_tournaments', _parse_user_tournaments, response.content, response.encoding, response.url, response.status_code, date.today())
         
+    except (UpstreamUnavailable, SessionExpired):
+        raise
     except Exception as e:
         print(f"Error fetching tournaments: {e}")
         return []
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import time
+
+import pytest
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("TABROOM_STORE_PATH", os.path.join(_tmp, "public_data.sqlite3"))
+os.environ.setdefault("TABROOM_HISTORY_PATH", os.path.join(_tmp, "ballot_history.sqlite3"))
+os.environ.setdefault("TABROOM_PREWARM", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import tabroom_api  # noqa: E402
+import upstream  # noqa: E402
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, tournament_id):
+        self.tournament_id = tournament_id
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'tourn': {'id': self.tournament_id, 'name': f'Tournament {self.tournament_id}', 'events': []}}
+
+
+class FastUpstream:
+    """A healthy Tabroom that answers every invite request in 50 ms"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        time.sleep(0.05)
+        return FakeResponse(url.rsplit('/', 1)[-1])
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    fake = FastUpstream()
+    monkeypatch.setattr(tabroom_api, '_get_public_session', lambda: fake)
+    # Fresh limiters, breakers and caches for every test
+    monkeypatch.setattr(upstream, '_buckets', {})
+    monkeypatch.setattr(upstream, '_limiters', {})
+    monkeypatch.setattr(upstream, '_breakers', {})
+    monkeypatch.setattr(main, '_tournament_cache', main.TTLCache(ttl=main.TOURNAMENT_CACHE_TTL))
+    monkeypatch.setattr(main, '_store', main.PublicDataStore(os.path.join(tempfile.mkdtemp(), 'store.sqlite3')))
+    return fake
+
+
+def test_max_size_batch_is_paced_not_rejected(fake_upstream):
+    ids = [str(100000 + i) for i in range(main.BATCH_MAX_IDS)]
+    response = TestClient(main.app).post('/tournaments/batch', json={'ids': ids})
+    assert response.status_code == 200
+    body = response.json()
+    assert body['failed'] == []
+    assert body['notFound'] == []
+    assert [t['id'] for t in body['tournaments']] == ids
+    assert fake_upstream.calls == main.BATCH_MAX_IDS
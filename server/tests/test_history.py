@@ -0,0 +1,100 @@
+import pytest
+
+from history import BallotHistoryStore, entry_key, season_for
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BallotHistoryStore(str(tmp_path / 'history.sqlite3'))
+
+
+ENTRY = {
+    'tournName': 'Glenbrooks',
+    'dateIso': '2025-11-22',
+    'code': 'Lincoln AB',
+    'division': 'VCX',
+    'resultUrl': 'https://www.tabroom.com/index/tourn/postings/entry_record.mhtml?entry_id=1',
+}
+
+
+def rounds(*results):
+    return [
+        {'round': f'R{n}', 'judge': f'Judge {n}', 'side': 'Aff', 'opponent': f'Opp {n}', 'result': result}
+        for n, result in enumerate(results, 1)
+    ]
+
+
+def test_season_for():
+    assert season_for('2025-10-04') == '2025-26'
+    assert season_for('2026-03-01') == '2025-26'
+    assert season_for('2026-08-01') == '2026-27'
+    assert season_for(None) is None
+
+
+def test_resave_is_deduplicated(store):
+    assert store.save_entry('u', ENTRY, rounds('W', 'L')) == 2
+    assert store.save_entry('u', ENTRY, rounds('W', 'L')) == 0
+    assert store.entries('u') == [
+        {
+            'tournName': 'Glenbrooks', 'tournUrl': None, 'dateIso': '2025-11-22', 'season': '2025-26',
+            'code': 'Lincoln AB', 'division': 'VCX', 'resultUrl': ENTRY['resultUrl'], 'wins': 1, 'losses': 1,
+            'ballotWins': 1, 'ballotLosses': 1,
+        }
+    ]
+    assert store.synced_entries('u') == {entry_key(ENTRY): '2025-11-22'}
+
+
+def test_resync_fills_in_results_posted_later(store):
+    assert store.save_entry('u', ENTRY, rounds('W', None)) == 2
+    assert store.save_entry('u', ENTRY, rounds('W', 'L')) == 1
+    assert store.stats('u', 'event') == [{'event': 'VCX', 'wins': 1, 'losses': 1, 'rounds': 2, 'ballotWins': 1, 'ballotLosses': 1}]
+
+
+def test_users_are_isolated(store):
+    store.save_entry('u', ENTRY, rounds('W'))
+    store.save_entry('v', ENTRY, rounds('L'))
+    assert store.stats('u', 'tournament') == [{'tournament': 'Glenbrooks', 'wins': 1, 'losses': 0, 'rounds': 1, 'ballotWins': 1, 'ballotLosses': 0}]
+    assert store.stats('v', 'tournament') == [{'tournament': 'Glenbrooks', 'wins': 0, 'losses': 1, 'rounds': 1, 'ballotWins': 0, 'ballotLosses': 1}]
+
+
+def test_stats_grouping_and_season_filter(store):
+    store.save_entry('u', ENTRY, rounds('W', 'W', 'L'))
+    later = {**ENTRY, 'tournName': 'TOC', 'dateIso': '2026-09-20', 'resultUrl': 'https://example/2'}
+    store.save_entry('u', later, [{'round': 'R1', 'judge': 'Judge 1', 'opponent': 'Opp 9', 'result': 'L'}])
+
+    by_judge = {row['judge']: row for row in store.stats('u', 'judge')}
+    assert by_judge['Judge 1'] == {'judge': 'Judge 1', 'wins': 1, 'losses': 1, 'rounds': 2, 'ballotWins': 1, 'ballotLosses': 1}
+
+    assert store.stats('u', 'season') == [
+        {'season': '2025-26', 'wins': 2, 'losses': 1, 'rounds': 3, 'ballotWins': 2, 'ballotLosses': 1},
+        {'season': '2026-27', 'wins': 0, 'losses': 1, 'rounds': 1, 'ballotWins': 0, 'ballotLosses': 1},
+    ]
+    assert store.stats('u', 'tournament', season='2026-27') == [
+        {'tournament': 'TOC', 'wins': 0, 'losses': 1, 'rounds': 1, 'ballotWins': 0, 'ballotLosses': 1}
+    ]
+    assert [e['tournName'] for e in store.entries('u')] == ['TOC', 'Glenbrooks']
+
+
+def test_panel_ballots_count_as_one_round(store):
+    elim = {**ENTRY, 'resultUrl': 'https://example/elims'}
+    panel = [
+        {'round': 'Octas', 'judge': 'Judge A', 'side': 'Neg', 'opponent': 'Opp 1', 'result': 'W'},
+        {'round': 'Octas', 'judge': 'Judge B', 'side': 'Neg', 'opponent': 'Opp 1', 'result': 'W'},
+        {'round': 'Octas', 'judge': 'Judge C', 'side': 'Neg', 'opponent': 'Opp 1', 'result': 'L'},
+        {'round': 'Quarters', 'judge': 'Judge A', 'side': 'Aff', 'opponent': 'Opp 2', 'result': 'L'},
+        {'round': 'Quarters', 'judge': 'Judge D', 'side': 'Aff', 'opponent': 'Opp 2', 'result': 'W'},
+        {'round': 'Quarters', 'judge': 'Judge E', 'side': 'Aff', 'opponent': 'Opp 2', 'result': 'L'},
+    ]
+    assert store.save_entry('u', elim, panel) == 6
+
+    assert store.stats('u', 'event') == [
+        {'event': 'VCX', 'wins': 1, 'losses': 1, 'rounds': 2, 'ballotWins': 3, 'ballotLosses': 3}
+    ]
+    [entry] = store.entries('u')
+    assert (entry['wins'], entry['losses'], entry['ballotWins'], entry['ballotLosses']) == (1, 1, 3, 3)
+    # Each judge's record is their own ballots
+    by_judge = {row['judge']: row for row in store.stats('u', 'judge')}
+    assert by_judge['Judge A'] == {'judge': 'Judge A', 'wins': 1, 'losses': 1, 'rounds': 2, 'ballotWins': 1, 'ballotLosses': 1}
+    assert by_judge['Judge C']['losses'] == 1
+    by_opponent = {row['opponent']: row for row in store.stats('u', 'opponent')}
+    assert by_opponent['Opp 2'] == {'opponent': 'Opp 2', 'wins': 0, 'losses': 1, 'rounds': 1, 'ballotWins': 1, 'ballotLosses': 2}
@@ -0,0 +1,99 @@
+import pytest
+
+from tabroom_api import sanitize_invite_html
+
+
+def clean(html, **kwargs):
+    return sanitize_invite_html(html, **kwargs)['html']
+
+
+@pytest.mark.parametrize(
+    'html',
+    [
+        '<a href="javascript:alert(1)">x</a>',
+        '<a href=" JaVaScRiPt:alert(1)">x</a>',
+        '<a href="java&#x09;script:alert(1)">x</a>',
+        '<a href="java&#10;script:alert(1)">x</a>',
+        '<a href="&#0;javascript:alert(1)">x</a>',
+        '<a href="&#106;avascript:alert(1)">x</a>',
+        '<a href="vbscript:msgbox(1)">x</a>',
+        '<a href="data:text/html;base64,PHNjcmlwdD4=">x</a>',
+    ],
+)
+def test_unsafe_link_schemes_are_removed(html):
+    assert clean(html) == '<a>x</a>'
+
+
+@pytest.mark.parametrize(
+    'html, expected',
+    [
+        ('<a href="https://www.tabroom.com/index">x</a>', '<a href="https://www.tabroom.com/index">x</a>'),
+        ('<a href="/index/tourn/index.mhtml?tourn_id=1">x</a>', '<a href="/index/tourn/index.mhtml?tourn_id=1">x</a>'),
+        ('<a href="?q=a:b">x</a>', '<a href="?q=a:b">x</a>'),
+        ('<a href="mailto:tab@example.com">x</a>', '<a href="mailto:tab@example.com">x</a>'),
+        ('<img src="https://example.com/map.png" alt="map">', '<img alt="map" src="https://example.com/map.png"/>'),
+        ('<img src="data:image/png;base64,AAAA">', '<img/>'),
+        ('<img src="x.png" srcset="javascript:alert(1)">', '<img src="x.png"/>'),
+    ],
+)
+def test_safe_urls_are_kept(html, expected):
+    assert clean(html) == expected
+
+
+@pytest.mark.parametrize(
+    'html, expected',
+    [
+        ('<p onclick="alert(1)" onmouseover="x()">hi</p>', '<p>hi</p>'),
+        ('<img src="x.png" onerror="alert(1)">', '<img src="x.png"/>'),
+        ('<p style="background:url(javascript:x)" class="c" id="i">hi</p>', '<p>hi</p>'),
+        ('<td colspan="2" width="5">x</td>', '<td colspan="2">x</td>'),
+    ],
+)
+def test_attributes_are_allowlisted(html, expected):
+    assert clean(html) == expected
+
+
+@pytest.mark.parametrize(
+    'html, expected',
+    [
+        ('<p>a</p><script>alert(1)</script><p>b</p>', '<p>a</p><p>b</p>'),
+        ('<style>p { color: red }</style>text', 'text'),
+        ('<svg><a xlink:href="javascript:alert(1)">x</a></svg>after', 'after'),
+        ('<math><mtext><a href="javascript:x">y</a></mtext></math>after', 'after'),
+        ('<iframe src="https://evil"></iframe><form><input name="x"></form>ok', 'ok'),
+        ('<p>a<!-- hidden --></p><!--[if IE]><script>x</script><![endif]-->', '<p>a</p>'),
+        ('<custom-tag>kept <b>bold</b></custom-tag>', 'kept <b>bold</b>'),
+    ],
+)
+def test_active_content_is_dropped_and_unknown_tags_unwrapped(html, expected):
+    assert clean(html) == expected
+
+
+def test_empty_invite():
+    assert sanitize_invite_html(None) == {'html': None, 'truncated': False, 'originalLength': 0}
+    assert sanitize_invite_html('') == {'html': None, 'truncated': False, 'originalLength': 0}
+
+
+def test_short_invite_is_not_truncated():
+    result = sanitize_invite_html('<p>hello</p>', max_chars=100)
+    assert result == {'html': '<p>hello</p>', 'truncated': False, 'originalLength': 12}
+
+
+@pytest.mark.parametrize('max_chars', [20, 37, 50, 64, 100, 151])
+def test_truncation_closes_open_tags_within_the_cap(max_chars):
+    html = '<div><table><tr><td><p>' + 'word ' * 60 + '<a href="https://x.example/long">link</a></p></td></tr></table></div>'
+    result = sanitize_invite_html(html, max_chars=max_chars)
+    assert result['truncated']
+    assert result['originalLength'] == len(html)
+    assert len(result['html']) <= max_chars
+    # Every tag that was opened is closed again
+    for tag in ('div', 'table', 'tr', 'td', 'p', 'a'):
+        assert result['html'].count(f'<{tag}>') + result['html'].count(f'<{tag} ') == result['html'].count(f'</{tag}>')
+
+
+def test_truncation_never_leaves_a_partial_tag():
+    html = '<p>' + 'x' * 40 + '<a href="https://example.com/a-very-long-path">link</a></p>'
+    result = sanitize_invite_html(html, max_chars=60)
+    assert len(result['html']) <= 60
+    assert '<a' not in result['html']
+    assert result['html'].endswith('</p>')
@@ -0,0 +1,91 @@
+import pytest
+
+from listing import UpcomingIndex, cursor_for, decode_cursor
+
+
+def tournament(tid, start, name, state=None, city=None):
+    return {'id': tid, 'name': name, 'startDate': start, 'state': state, 'city': city}
+
+
+LISTING = [
+    tournament('10', '2026-11-07T08:00:00', 'Apple Valley', 'MN', 'Apple Valley'),
+    tournament('11', '2026-11-07T09:00:00', 'Alta Invitational', 'UT', 'Sandy'),
+    tournament('12', '2026-11-14', 'Glenbrooks', 'IL', 'Northbrook'),
+    tournament('13', '2026-11-14', 'Alamo Classic', 'TX', 'San Antonio'),
+    tournament('14', '2026-11-21', 'Austin Open', 'TX', 'Austin'),
+    tournament('15', '2026-12-05', 'Alief Taylor', 'TX', 'Houston'),
+    tournament('16', '2026-12-12', 'Harvard', 'MA', 'Cambridge'),
+]
+
+
+def ids(items):
+    return [t['id'] for t in items]
+
+
+def walk(index, limit, **filters):
+    """Page through the index, returning every id seen"""
+    seen, cursor = [], None
+    while True:
+        items, cursor = index.query(cursor=cursor, limit=limit, **filters)
+        seen.extend(ids(items))
+        if cursor is None:
+            return seen
+
+
+def test_orders_by_start_date_then_id():
+    items, cursor = UpcomingIndex(LISTING).query()
+    assert ids(items) == ['10', '11', '12', '13', '14', '15', '16']
+    assert cursor is None
+
+
+def test_pages_cover_listing_exactly_once():
+    index = UpcomingIndex(LISTING)
+    for limit in (1, 2, 3, 7):
+        assert walk(index, limit) == ['10', '11', '12', '13', '14', '15', '16']
+
+
+def test_filters_combine():
+    index = UpcomingIndex(LISTING)
+    items, _ = index.query(state='tx', name_prefix='al', date_from='2026-11-01', date_to='2026-11-30')
+    assert ids(items) == ['13']
+    items, _ = index.query(state='TX', city='austin')
+    assert ids(items) == ['14']
+    assert walk(index, 1, state='TX', name_prefix='Al') == ['13', '15']
+
+
+def test_cursor_survives_refresh_with_inserted_and_removed_items():
+    index = UpcomingIndex(LISTING)
+    first, cursor = index.query(state='TX', limit=1)
+    assert ids(first) == ['13']
+
+    # The listing is refreshed: one tournament before the cursor is added, one after is
+    # removed and another after it is added. The next page continues after '13'.
+    refreshed = [t for t in LISTING if t['id'] != '14'] + [
+        tournament('20', '2026-11-01', 'Early TX', 'TX', 'Dallas'),
+        tournament('21', '2026-11-28', 'Late TX', 'TX', 'Plano'),
+    ]
+    rest, cursor = UpcomingIndex(refreshed).query(state='TX', cursor=cursor, limit=10)
+    assert ids(rest) == ['21', '15']
+    assert cursor is None
+
+
+def test_cursor_for_matches_page_cursor():
+    index = UpcomingIndex(LISTING)
+    items, cursor = index.query(limit=2)
+    assert cursor_for(items[-1]) == cursor
+    assert decode_cursor(cursor) == ('2026-11-07', '11')
+
+
+def test_field_projection():
+    items, _ = UpcomingIndex(LISTING).query(limit=1, fields=['id', 'name'])
+    assert items == [{'id': '10', 'name': 'Apple Valley'}]
+
+
+def test_location_fallback_for_older_entries():
+    index = UpcomingIndex([{'id': '1', 'name': 'Old', 'startDate': '2026-10-01', 'location': 'Dallas, TX'}])
+    assert ids(index.query(state='TX', city='Dallas')[0]) == ['1']
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        UpcomingIndex(LISTING).query(cursor='not-a-cursor')
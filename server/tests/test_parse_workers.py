@@ -0,0 +1,43 @@
+import pytest
+
+import tabroom_api
+from profiling import profile_request
+
+PAGE = b'<html><body><span class="username">Jordan Lee</span></body></html>'
+
+
+@pytest.fixture
+def process_mode(monkeypatch):
+    # One spawn worker, so the second parse sees the plan the first one learned
+    monkeypatch.setattr(tabroom_api, 'PARSE_MODE', 'process')
+    monkeypatch.setattr(tabroom_api, 'PARSE_WORKERS', 1)
+    monkeypatch.setattr(tabroom_api, '_parse_pool', None)
+    monkeypatch.setattr(tabroom_api, '_extraction_plans', tabroom_api.ExtractionPlans())
+    yield
+    if tabroom_api._parse_pool is not None:
+        tabroom_api._parse_pool.shutdown()
+
+
+def test_worker_plan_counters_are_merged_into_server_process(process_mode):
+    for _ in range(2):
+        result = tabroom_api.run_parser(tabroom_api._parse_user_info, PAGE, 'utf-8', None)
+        assert result == {'user_name': 'Jordan Lee'}
+
+    assert tabroom_api.extraction_plan_stats() == {'user_info.user_name': {'hits': 1, 'misses': 1}}
+
+
+def test_worker_spans_are_replayed_into_request_profile(process_mode):
+    with profile_request('/test') as profile:
+        tabroom_api.run_parser(tabroom_api._parse_user_info, PAGE, 'utf-8', None)
+
+    names = [name for name, _, _ in profile.spans]
+    assert 'soup' in names
+    assert 'extract user_name' in names
+    assert all(start >= 0 for _, start, _ in profile.spans)
+
+
+def test_worker_skips_span_recording_when_not_profiled(process_mode):
+    result, counts, spans = tabroom_api._parse_in_worker(tabroom_api._parse_user_info, False, PAGE, 'utf-8', None)
+    assert result == {'user_name': 'Jordan Lee'}
+    assert counts == {'user_info.user_name': {'hits': 0, 'misses': 1}}
+    assert spans == []
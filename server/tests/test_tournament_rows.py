@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+
+from tabroom_api import _classify_tournament_rows, _parse_row_date
+
+TODAY = date(2025, 10, 15)
+
+
+@pytest.mark.parametrize(
+    'date_text, status_text, expected',
+    [
+        # (date column, status column) -> dateIso of the kept row, or None when the row is dropped
+        ('Oct 14, 2025', 'Confirmed', None),
+        ('Jan 3, 2024', 'Upcoming', None),
+        ('Oct 15, 2025', 'Confirmed', '2025-10-15T00:00:00'),
+        ('Oct 15, 2025', 'waitlisted', '2025-10-15T00:00:00'),
+        ('Oct 15, 2025', 'Upcoming', None),
+        ('Oct 15, 2025', 'Pending', None),
+        ('Oct 16, 2025', 'Upcoming', '2025-10-16T00:00:00'),
+        ('Nov 1 2025', 'Upcoming', '2025-11-01T00:00:00'),
+        ('Jan 3, 2026', 'Confirmed', '2026-01-03T00:00:00'),
+        ('Glenbrooks Classic', 'Upcoming', None),
+        ('TFA State', 'Upcoming', None),
+        ('Fall Swing', 'Upcoming', None),
+        ('2025-10-20', 'Upcoming', None),
+        ('October 20, 2025', 'Upcoming', None),
+        ('Oct 32, 2025', 'Upcoming', None),
+    ],
+)
+def test_date_and_status_classification(date_text, status_text, expected):
+    rows = _classify_tournament_rows([('Heart of Texas', date_text, 'LD', status_text)], TODAY)
+    if expected is None:
+        assert rows == []
+    else:
+        assert [row['dateIso'] for row in rows] == [expected]
+
+
+@pytest.mark.parametrize('date_text', ['TBD', ''])
+def test_undated_rows_are_kept_without_date(date_text):
+    rows = _classify_tournament_rows([('Heart of Texas', date_text, 'LD', 'Upcoming')], TODAY)
+    assert rows == [{'id': 'tournament_1', 'name': 'Heart of Texas', 'status': 'Upcoming', 'dateIso': None, 'event': 'LD'}]
+
+
+@pytest.mark.parametrize(
+    'status_text, expected',
+    [('Confirmed', 'Confirmed'), ('Entry Waitlisted', 'Waitlisted'), ('Upcoming', 'Upcoming'), ('confirmed', 'Upcoming')],
+)
+def test_status_normalization(status_text, expected):
+    rows = _classify_tournament_rows([('Heart of Texas', 'TBD', None, status_text)], TODAY)
+    assert rows[0]['status'] == expected
+
+
+@pytest.mark.parametrize(
+    'event_text, expected',
+    [
+        ('Varsity  Lincoln\n Douglas', 'Varsity Lincoln Douglas'),
+        ('Info', None),
+        ('details', None),
+        ('VIEW', None),
+        ('TBD', None),
+        ('   ', None),
+        (None, None),
+    ],
+)
+def test_event_cleanup(event_text, expected):
+    rows = _classify_tournament_rows([('Heart of Texas', 'TBD', event_text, 'Upcoming')], TODAY)
+    assert rows[0]['event'] == expected
+
+
+def test_short_names_are_skipped_and_ids_stay_sequential():
+    rows = _classify_tournament_rows(
+        [
+            ('ABC', 'Oct 20, 2025', 'LD', 'Upcoming'),
+            ('Heart of Texas', 'Oct 20, 2025', 'LD', 'Upcoming'),
+            ('Old One', 'Oct 1, 2025', 'LD', 'Upcoming'),
+            ('Glenbrooks', 'Nov 22, 2025', 'CX', 'Confirmed'),
+        ],
+        TODAY,
+    )
+    assert [(row['id'], row['name']) for row in rows] == [('tournament_1', 'Heart of Texas'), ('tournament_2', 'Glenbrooks')]
+
+
+def test_parse_row_date():
+    assert _parse_row_date('Oct 4, 2025') == date(2025, 10, 4)
+    assert _parse_row_date('Oct 4 2025') == date(2025, 10, 4)
+    assert _parse_row_date('Oct 4,2025') is None
+    assert _parse_row_date('4 Oct 2025') is None
@@ -0,0 +1,238 @@
+import threading
+
+import pytest
+
+import upstream
+from upstream import AdaptiveLimiter, CircuitBreaker, TokenBucket, deadline, remaining_time
+
+
+class FakeClock:
+    """Stands in for the time module inside upstream so tests control the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(upstream, "time", fake)
+    return fake
+
+
+def test_bucket_serves_burst_then_fails_fast(clock):
+    bucket = TokenBucket(rate=10, burst=3)
+    assert all(bucket.try_acquire() for _ in range(3))
+    assert not bucket.try_acquire()
+    # The next token is 0.1s away, more than the caller is willing to wait
+    assert not bucket.try_acquire(max_wait=0.05)
+
+
+def test_bucket_refills_at_rate_up_to_burst(clock):
+    bucket = TokenBucket(rate=10, burst=3)
+    for _ in range(3):
+        bucket.try_acquire()
+    clock.advance(0.2)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.advance(60)
+    assert sum(bucket.try_acquire() for _ in range(5)) == 3
+
+
+def test_bucket_waits_for_next_token_within_max_wait(clock):
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket.try_acquire()
+    start = clock.now
+    assert bucket.try_acquire(max_wait=0.5)
+    assert clock.now - start == pytest.approx(0.1)
+
+
+def test_bucket_wait_acquire_paces_without_reserving(clock):
+    bucket = TokenBucket(rate=10, burst=2)
+    start = clock.now
+    assert all(bucket.wait_acquire(timeout=5) for _ in range(12))
+    # Two from the burst, then one every 0.1s
+    assert clock.now - start == pytest.approx(1.0)
+    assert not bucket.wait_acquire(timeout=0.05)
+    # Nothing was reserved by the failed wait, so a fail-fast caller isn't pushed back
+    clock.advance(0.1)
+    assert bucket.try_acquire()
+
+
+def test_limiter_caps_in_flight_calls(clock):
+    limiter = AdaptiveLimiter(initial=2, min_limit=1, max_limit=8, latency_target=3.0)
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release(latency=0.1, ok=True)
+    assert limiter.try_acquire()
+
+
+def test_limiter_waits_for_a_slot_when_asked():
+    limiter = AdaptiveLimiter(initial=1, min_limit=1, max_limit=1, latency_target=3.0)
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire(max_wait=0.05)
+    threading.Timer(0.05, limiter.release, kwargs={'latency': 0.1, 'ok': True}).start()
+    assert limiter.try_acquire(max_wait=2)
+    assert limiter.in_flight == 1
+
+
+def test_limiter_halves_on_error_once_per_window(clock):
+    limiter = AdaptiveLimiter(initial=8, min_limit=1, max_limit=32, latency_target=3.0)
+    for _ in range(2):
+        limiter.try_acquire()
+    limiter.release(latency=0.1, ok=False)
+    assert limiter.limit == 4
+    # A second failure inside the same latency window doesn't halve again
+    limiter.release(latency=5.0, ok=True)
+    assert limiter.limit == 4
+    clock.advance(3.5)
+    limiter.try_acquire()
+    limiter.release(latency=5.0, ok=True)
+    assert limiter.limit == 2
+
+
+def test_limiter_never_drops_below_min(clock):
+    limiter = AdaptiveLimiter(initial=2, min_limit=1, max_limit=8, latency_target=1.0)
+    for _ in range(5):
+        clock.advance(2)
+        limiter.try_acquire()
+        limiter.release(latency=0.1, ok=False)
+    assert limiter.limit == 1
+
+
+def test_limiter_recovers_additively(clock):
+    limiter = AdaptiveLimiter(initial=8, min_limit=1, max_limit=10, latency_target=3.0)
+    limiter.try_acquire()
+    limiter.release(latency=0.1, ok=False)
+    assert limiter.limit == 4
+    # Roughly one step per `limit` healthy calls
+    for _ in range(4):
+        limiter.try_acquire()
+        limiter.release(latency=0.1, ok=True)
+    assert 4.9 < limiter.limit < 5.1
+    for _ in range(200):
+        limiter.try_acquire()
+        limiter.release(latency=0.1, ok=True)
+    assert limiter.limit == 10
+
+
+def test_breaker_opens_after_threshold_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, slow_call=10, cooldown=30)
+    for _ in range(2):
+        breaker.record(latency=0.1, ok=False)
+    assert breaker.state == "closed"
+    breaker.record(latency=0.1, ok=False)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_counts_slow_calls_and_resets_on_success(clock):
+    breaker = CircuitBreaker(failure_threshold=2, slow_call=10, cooldown=30)
+    breaker.record(latency=11, ok=True)
+    breaker.record(latency=0.1, ok=True)
+    breaker.record(latency=11, ok=True)
+    assert breaker.state == "closed"
+    breaker.record(latency=11, ok=True)
+    assert breaker.state == "open"
+
+
+def test_breaker_half_open_probe_closes_on_success(clock):
+    breaker = CircuitBreaker(failure_threshold=1, slow_call=10, cooldown=30)
+    breaker.record(latency=0.1, ok=False)
+    clock.advance(30)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    # Only one probe at a time: everyone else waits out a fresh cooldown
+    assert not breaker.allow()
+    breaker.record(latency=0.1, ok=True)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_breaker_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, slow_call=10, cooldown=30)
+    breaker.record(latency=0.1, ok=False)
+    clock.advance(31)
+    assert breaker.allow()
+    breaker.record(latency=0.1, ok=False)
+    assert breaker.state == "open"
+    clock.advance(10)
+    assert not breaker.allow()
+
+
+def test_nested_deadline_cannot_extend_outer(clock):
+    with deadline(1):
+        with deadline(60):
+            assert remaining_time() == pytest.approx(1)
+        with deadline(60, replace=True):
+            assert remaining_time() == pytest.approx(60)
+        with deadline(0.5):
+            assert remaining_time() == pytest.approx(0.5)
+    assert remaining_time() is None
+
+
+class SlowBodyResponse:
+    """A streamed response whose body takes `body_seconds` to download"""
+
+    def __init__(self, clock, limiter, body_seconds, status_code=200, is_redirect=False):
+        self.clock = clock
+        self.limiter = limiter
+        self.body_seconds = body_seconds
+        self.status_code = status_code
+        self.is_redirect = is_redirect
+        self.in_flight_during_read = None
+
+    @property
+    def content(self):
+        if self.in_flight_during_read is None:
+            self.in_flight_during_read = self.limiter.in_flight
+            self.clock.advance(self.body_seconds)
+        return b'<html></html>'
+
+
+def test_streamed_body_is_read_while_slot_is_held(clock, monkeypatch):
+    monkeypatch.setattr(upstream, "_buckets", {})
+    monkeypatch.setattr(upstream, "_limiters", {})
+    monkeypatch.setattr(upstream, "_breakers", {})
+    _, limiter = upstream._controls_for("www.tabroom.com")
+    latencies = []
+    release = limiter.release
+    monkeypatch.setattr(limiter, "release", lambda latency, ok: (latencies.append(latency), release(latency, ok)))
+
+    class Client:
+        def request(self, method, url, **kwargs):
+            clock.advance(0.1)
+            self.response = SlowBodyResponse(clock, limiter, body_seconds=2.0)
+            return self.response
+
+    client = Client()
+    upstream.upstream_request(client, "GET", "https://www.tabroom.com/user/index.mhtml", stream=True)
+    assert client.response.in_flight_during_read == 1
+    assert limiter.in_flight == 0
+    assert latencies == [pytest.approx(2.1)]
+
+
+def test_streamed_redirect_body_is_left_unread(clock, monkeypatch):
+    monkeypatch.setattr(upstream, "_buckets", {})
+    monkeypatch.setattr(upstream, "_limiters", {})
+    monkeypatch.setattr(upstream, "_breakers", {})
+    _, limiter = upstream._controls_for("www.tabroom.com")
+    response = SlowBodyResponse(clock, limiter, body_seconds=2.0, status_code=302, is_redirect=True)
+
+    class Client:
+        def request(self, method, url, **kwargs):
+            return response
+
+    upstream.upstream_request(Client(), "GET", "https://www.tabroom.com/user/index.mhtml", stream=True)
+    assert response.in_flight_during_read is None
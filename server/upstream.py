@@ -0,0 +1,332 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from urllib.parse import urlsplit
+
+from lazy import lazy_import
+from profiling import span
+
+requests = lazy_import("requests")
+
+# Per-host request budget toward Tabroom: steady rate (requests/second) and burst size.
+UPSTREAM_RATE = 10.0
+UPSTREAM_BURST = 20
+# How long a caller may wait for a rate-limit token before we give up and fail fast.
+UPSTREAM_MAX_QUEUE_WAIT = 0.5
+# Bulk work (batch/export fan-out) instead waits for capacity up to the request deadline,
+# or this long when there is none.
+UPSTREAM_BULK_MAX_WAIT = 30.0
+# Adaptive concurrency bounds (AIMD) and the latency above which we back off.
+UPSTREAM_INITIAL_CONCURRENCY = 8
+UPSTREAM_MIN_CONCURRENCY = 1
+UPSTREAM_MAX_CONCURRENCY = 32
+UPSTREAM_LATENCY_TARGET = 3.0
+# Connect/read budgets for a single upstream call; both are clipped to the request deadline.
+UPSTREAM_CONNECT_TIMEOUT = 5.0
+UPSTREAM_READ_TIMEOUT = 15.0
+# Circuit breaker: trip after this many consecutive failures (errors or calls slower than
+# BREAKER_SLOW_CALL), then reject calls for BREAKER_COOLDOWN seconds before letting a probe through.
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_SLOW_CALL = 10.0
+BREAKER_COOLDOWN = 30.0
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when Tabroom can't be called right now or didn't answer in time."""
+
+
+class UpstreamBusy(UpstreamUnavailable):
+    """Raised when the rate or concurrency limit for a host is exhausted."""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """Raised when the circuit breaker for an endpoint is open."""
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    """Raised when the request deadline runs out before or during an upstream call."""
+
+
+# Absolute deadline (time.monotonic()) for the request currently being served, if any.
+_deadline: ContextVar[Optional[float]] = ContextVar("upstream_deadline", default=None)
+# Set while making calls on behalf of a bulk fan-out; see bulk_pacing()
+_bulk: ContextVar[bool] = ContextVar("upstream_bulk", default=False)
+
+
+@contextmanager
+def deadline(seconds: float, replace: bool = False):
+    """
+    Bound every upstream call made inside the block by a shared deadline. A nested
+    deadline can only tighten the enclosing one unless `replace` is set.
+    """
+    new_deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None and not replace:
+        new_deadline = min(current, new_deadline)
+    token = _deadline.set(new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+@contextmanager
+def bulk_pacing():
+    """
+    Mark upstream calls made inside the block as bulk work: rather than failing fast they
+    wait, up to the deadline, for a rate-limit token and a concurrency slot. They never
+    reserve tokens ahead, so interactive callers keep priority.
+    """
+    token = _bulk.set(True)
+    try:
+        yield
+    finally:
+        _bulk.reset(token)
+
+
+class TokenBucket:
+    """Classic token bucket; tokens refill continuously at `rate` up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, max_wait: float = 0.0) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            wait = (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return False
+            # Reserve the next token and wait for it outside the lock
+            self._tokens -= 1
+        time.sleep(wait)
+        return True
+
+    def wait_acquire(self, timeout: float) -> bool:
+        """Take a token once one is actually free, waiting up to `timeout`; never reserves ahead"""
+        give_up = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # Tolerate float residue from refills, or a waiter could spin on a ~0s sleep
+                if self._tokens >= 1 - 1e-9:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > give_up:
+                return False
+            time.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that grows additively while calls are fast and healthy and
+    halves when they error out or exceed the latency target (AIMD).
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, latency_target: float):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+
+    def try_acquire(self, max_wait: float = 0.0) -> bool:
+        with self._lock:
+            if self.in_flight >= int(self.limit) and max_wait > 0:
+                self._slot_freed.wait_for(lambda: self.in_flight < int(self.limit), timeout=max_wait)
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._slot_freed.notify()
+            now = time.monotonic()
+            if not ok or latency > self.latency_target:
+                # Only back off once per latency window, so one slow burst doesn't collapse the limit
+                if now - self._last_decrease > self.latency_target:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint breaker. Closed: calls flow. Open: calls are rejected immediately.
+    After the cooldown one probe call is let through; success closes the breaker again.
+    """
+
+    def __init__(self, failure_threshold: int, slow_call: float, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.slow_call = slow_call
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.cooldown:
+                return False
+            # Let one probe through and re-arm the cooldown for everyone else
+            self.opened_at = now
+            return True
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            if ok and latency <= self.slow_call:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+_buckets = {}
+_limiters = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+_ID_SEGMENT_RE = re.compile(r'/\d+(?=/|$)')
+
+
+def _endpoint_key(url: str) -> str:
+    """Group URLs into endpoints for the breaker, e.g. api.tabroom.com/v1/public/invite/tourn/:id"""
+    parts = urlsplit(url)
+    return parts.netloc + _ID_SEGMENT_RE.sub('/:id', parts.path)
+
+
+def _breaker_for(endpoint: str) -> CircuitBreaker:
+    with _registry_lock:
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_SLOW_CALL, BREAKER_COOLDOWN)
+        return _breakers[endpoint]
+
+
+def _controls_for(host: str):
+    with _registry_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(UPSTREAM_RATE, UPSTREAM_BURST)
+            _limiters[host] = AdaptiveLimiter(
+                UPSTREAM_INITIAL_CONCURRENCY,
+                UPSTREAM_MIN_CONCURRENCY,
+                UPSTREAM_MAX_CONCURRENCY,
+                UPSTREAM_LATENCY_TARGET,
+            )
+        return _buckets[host], _limiters[host]
+
+
+def upstream_request(client, method: str, url: str, endpoint: Optional[str] = None, **kwargs):
+    """
+    Send a request to Tabroom through the endpoint's circuit breaker and the host's
+    rate and adaptive concurrency limiters, bounded by the current request deadline.
+    `client` is either the `requests` module or a `requests.Session`. With stream=True only
+    redirect bodies are left unread; any other body is downloaded before the concurrency
+    slot is released, so the limiters and breaker see the full transfer time.
+    Raises an UpstreamUnavailable subclass instead of waiting when Tabroom can't be called.
+    """
+    host = urlsplit(url).netloc
+    endpoint = endpoint or _endpoint_key(url)
+
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before calling {endpoint}")
+    breaker = _breaker_for(endpoint)
+    if not breaker.allow():
+        raise CircuitOpen(f"Circuit open for {endpoint}")
+    bucket, limiter = _controls_for(host)
+    if _bulk.get():
+        if not bucket.wait_acquire(UPSTREAM_BULK_MAX_WAIT if remaining is None else remaining):
+            raise UpstreamBusy(f"Rate limit reached for {host}")
+        remaining = remaining_time()
+        slot_wait = UPSTREAM_BULK_MAX_WAIT if remaining is None else max(0.0, remaining)
+    else:
+        max_wait = UPSTREAM_MAX_QUEUE_WAIT if remaining is None else min(UPSTREAM_MAX_QUEUE_WAIT, remaining)
+        if not bucket.try_acquire(max_wait):
+            raise UpstreamBusy(f"Rate limit reached for {host}")
+        slot_wait = 0.0
+    if not limiter.try_acquire(slot_wait):
+        raise UpstreamBusy(f"Too many concurrent requests to {host} (limit {int(limiter.limit)})")
+
+    connect_timeout, read_timeout = UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT
+    remaining = remaining_time()
+    if remaining is not None:
+        connect_timeout = max(0.01, min(connect_timeout, remaining))
+        read_timeout = max(0.01, min(read_timeout, remaining))
+    kwargs["timeout"] = (connect_timeout, read_timeout)
+
+    started = time.monotonic()
+    ok = False
+    try:
+        with span(f"upstream {endpoint}"):
+            response = client.request(method, url, **kwargs)
+            if kwargs.get("stream") and not response.is_redirect:
+                response.content
+        ok = response.status_code != 429 and response.status_code < 500
+        return response
+    except requests.Timeout as e:
+        raise DeadlineExceeded(f"Timed out calling {endpoint}: {e}")
+    finally:
+        latency = time.monotonic() - started
+        limiter.release(latency, ok)
+        breaker.record(latency, ok)
+
+
+def upstream_get(client, url: str, **kwargs):
+    return upstream_request(client, "GET", url, **kwargs)
+
+
+def upstream_post(client, url: str, **kwargs):
+    return upstream_request(client, "POST", url, **kwargs)
+
+
+def upstream_stats() -> dict:
+    """Current limiter and breaker state, for diagnostics"""
+    with _registry_lock:
+        return {
+            "hosts": {
+                host: {
+                    "concurrency_limit": int(_limiters[host].limit),
+                    "in_flight": _limiters[host].in_flight,
+                }
+                for host in _limiters
+            },
+            "breakers": {
+                endpoint: {"state": breaker.state, "failures": breaker.failures}
+                for endpoint, breaker in _breakers.items()
+            },
+        }